@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import API_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Each request is bounded by REQUEST_TIMEOUT and retried up to FETCH_RETRIES times with exponential backoff
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', 10))
+FETCH_RETRIES = int(os.environ.get('FETCH_RETRIES', 3))
+RETRY_BACKOFF = float(os.environ.get('RETRY_BACKOFF', 1))
+# Requests per minute allowed before the API tells us its own limit (free tier of football-data.org)
+REQUESTS_PER_MINUTE = int(os.environ.get('REQUESTS_PER_MINUTE', 10))
+# Size of the HTTP connection pool shared by every request of the process
+POOL_SIZE = int(os.environ.get('POOL_SIZE', 10))
+
+
+class TokenBucket:
+    """ Rate limiter allowing `capacity` requests per minute, following the limits the API reports on every response.
+    Until the API has answered, tokens drip back at capacity per minute. Once a response tells how many requests are left
+    and when the API counter resets, the bucket holds exactly that many tokens until the reset, then refills to the limit the
+    API advertised, which also raises capacity when the account allows more than REQUESTS_PER_MINUTE.
+    """
+
+    def __init__(self, capacity=REQUESTS_PER_MINUTE):
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        # Monotonic time at which the API counter resets, None when the API has not reported it
+        self._reset_at = None
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if self._reset_at is not None and now >= self._reset_at:
+            # The API counter was reset, the whole advertised limit is available again
+            self.tokens = float(self.capacity)
+            self._reset_at = None
+        elif self._reset_at is None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def acquire(self):
+        """ This function blocks until a request may be sent and takes a token for it. """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                if self.tokens >= 1:
+                    wait = self._blocked_until - now
+                elif self._reset_at is not None:
+                    wait = max(self._blocked_until, self._reset_at) - now
+                else:
+                    wait = max(self._blocked_until - now, (1 - self.tokens) * 60 / self.capacity)
+            time.sleep(wait)
+
+    def update(self, available, reset):
+        """ This function aligns the bucket with the rate limit headers of a response.
+            args:
+                available (int): Requests left in the current minute (X-Requests-Available-Minute), or None if not sent.
+                reset (float): Seconds until the API counter resets (X-RequestCounter-Reset), or None if not sent.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if available is None:
+                return
+            # The response used one request of the minute, so the limit is at least what is left plus one
+            self.capacity = max(self.capacity, int(available) + 1)
+            self.tokens = max(float(available), 0.0)
+            if reset is not None:
+                self._reset_at = now + reset
+
+    def block(self, seconds):
+        """ This function stops every request for the given number of seconds, e.g. after a 429 response. """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class _Call:
+    # A request in flight, shared by every caller asking for the same URL and headers
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _header_number(headers, name):
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class FootballDataClient:
+    """ Client for the football-data.org API shared by the whole process.
+    It reuses pooled connections through a single Session, waits on a token bucket that follows the limits advertised in the
+    X-Requests-Available-Minute and X-RequestCounter-Reset headers, backs off on 429 and 5xx responses, and coalesces
+    concurrent identical requests so they share one request in flight.
+    """
+
+    def __init__(self, token, rate_limiter=None):
+        self.session = requests.Session()
+        self.session.headers['X-Auth-Token'] = token
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        """ This function sends a GET request, joining an identical request already in flight instead of sending a new one.
+            args:
+                url (str): The URL to request.
+                headers (dict): Extra request headers, e.g. If-None-Match.
+            returns:
+                Response: The response, shared with the other callers of the same request.
+            raises:
+                requests.RequestException: If every attempt failed without a response.
+        """
+        key = (url, tuple(sorted((headers or {}).items())))
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.response = self._send(url, headers)
+            except requests.RequestException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.response
+
+    def _send(self, url, headers):
+        # Retry connection errors, timeouts, 429 and 5xx responses with exponential backoff
+        for attempt in range(FETCH_RETRIES + 1):
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout):
+                API_SECONDS.observe(time.perf_counter() - start, status="error")
+                if attempt == FETCH_RETRIES:
+                    raise
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                continue
+            API_SECONDS.observe(time.perf_counter() - start, status=resp.status_code)
+
+            reset = _header_number(resp.headers, 'X-RequestCounter-Reset')
+            available = _header_number(resp.headers, 'X-Requests-Available-Minute')
+            self.rate_limiter.update(available, reset)
+            if resp.status_code == 429:
+                wait = _header_number(resp.headers, 'Retry-After') or reset or RETRY_BACKOFF * 2 ** attempt
+                logger.warning("Rate limited by the API, waiting %.0f seconds", wait)
+                self.rate_limiter.block(wait)
+            elif resp.status_code >= 500:
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+            else:
+                return resp
+            if attempt == FETCH_RETRIES:
+                return resp
@@ -1,140 +1,197 @@
-import requests
-import pandas as pd
 import dash
 from dash import dcc, html
-from functions import get_mathces_list_wc, get_mathces_list_cl, get_wc_stage_component, get_cl_stage_component
-from dash import Input, Output, callback
+from api_client import FootballDataClient
+from refresher import MatchDataRefresher, get_version
+from cache import LRUCache
+from competitions import COMPETITIONS
+from standings import get_standings, carry_over_standings
+from live import ScorePublisher, register_live_routes
+from metrics import CALLBACK_SECONDS, RENDER_SECONDS, register_metrics, set_response_labels
+from http_cache import get_asset_url, register_http_caching
+from dash import Input, Output, State, callback, clientside_callback, ClientsideFunction, ALL, MATCH
 from dash import ctx
 import time
 import os
-#from config import API_TOKEN, API_URL_MATCHES_WC, API_URL_MATCHES_CL #(for development)
-from constants import WC_PRIMARY_COLOR, WC_MAIN_BG_COLOR, WC_MAIN_COLOR, CL_PRIMARY_COLOR, CL_MAIN_BG_COLOR, CL_MAIN_COLOR
+#from config import API_TOKEN #(for development)
 
 API_TOKEN = os.environ.get('API_TOKEN') # Get API token from environment variable
-API_URL_MATCHES_WC = os.environ.get('API_URL_MATCHES_WC') # Get WC API URL from environment variable
-API_URL_MATCHES_CL = os.environ.get('API_URL_MATCHES_CL') # Get CL API URL from environment variable  
-
-# API and token
-headers = {'X-Auth-Token': API_TOKEN}
-
-# Fetch 2026 World Cup match data
-try:
-    wc_resp = requests.get(API_URL_MATCHES_WC, headers=headers)
-    wc_resp.raise_for_status()
-    wc_data = wc_resp.json()
-    wc_matches = wc_data.get('matches', [])
-except (requests.RequestException, ValueError, KeyError):
-    wc_matches = []
-# Fetch 2026 Champions League matches data
-try:
-    cl_resp = requests.get(API_URL_MATCHES_CL, headers=headers)
-    cl_resp.raise_for_status()
-    cl_data = cl_resp.json()
-    cl_matches = cl_data.get('matches', [])
-except (requests.RequestException, ValueError, KeyError):
-    cl_matches = []
-
-# Prepare the WC data
-wc_match_list = get_mathces_list_wc(wc_matches)
-wc_df = pd.DataFrame(wc_match_list)
-
-# Prepare the CL data
-cl_match_list = get_mathces_list_cl(cl_matches)
-cl_df = pd.DataFrame(cl_match_list)
-
-# Define stage order and labels
-WC_STAGES = wc_df['Stage'].unique().tolist()
-CL_STAGES = cl_df['Stage'].unique().tolist()
-stage_order = {
-    "WC": WC_STAGES,
-    "CL": CL_STAGES
-    }
-stage_labels = {
-    "WC": {
-        stage: stage.replace("_", " ").title() for stage in WC_STAGES
-    },
-    "CL": {
-        stage: stage.replace("_", " ").title() for stage in CL_STAGES
-    }
-}
+
+# API client shared by every request of the process
+client = FootballDataClient(API_TOKEN)
+
+# Match data of every competition is loaded the first time it is opened and kept fresh in the background from then on
+refresher = MatchDataRefresher(client)
+refresher.start()
+
+# Rendered stage components, shared by every session served by this process
+component_cache = LRUCache()
+
+
+def invalidate_components(code, previous, snapshot):
+    """ This function drops the cached components of the stages touched by a new snapshot, the others stay valid. """
+    changes = snapshot.changes
+
+    def is_stale(key):
+        # Keys are (code, stage, version) for stages and (code, stage, match day, version) for match days
+        if key[0] != code or (changes is not None and key[1] not in changes.stages):
+            return False
+        return key[-1] != get_version(snapshot, *key[1:-1])
+
+    component_cache.discard(is_stale)
+
+
+refresher.subscribe(invalidate_components)
+refresher.subscribe(carry_over_standings)
+
+# Score deltas of every refresh are pushed to the browsers through /live/stream while a match is live (assets/live.js)
+publisher = ScorePublisher()
+refresher.subscribe(publisher.on_snapshot)
+
+
+def get_snapshot(code):
+    """ This function returns the current snapshot of a competition of the registry, loading it on first access. """
+    competition = COMPETITIONS[code]
+    return refresher.ensure(code, competition.url, competition.normalizer)
+
+
+def get_stage_order(code):
+    """ This function returns the stages of a competition in the order they appear in its current snapshot. """
+    return get_snapshot(code).stages
+
+
+def get_stage_label(stage):
+    """ This function returns the display label of a stage code, e.g. GROUP_STAGE -> Group Stage. """
+    return stage.replace("_", " ").title()
+
+
+def get_stage_tabs(competition):
+    """ This function builds the stage tabs of a competition, styled with its theme colors. """
+    return dcc.Tabs(
+        id={"type": "stage-tabs", "competition": competition.code},
+        value=competition.default_stage,
+        children=[dcc.Tab(label=get_stage_label(t), value=t, style={"color": competition.main_color, "backgroundColor": competition.bg_color, "border": "none", "fontWeight": "bolder"}, selected_style={"backgroundColor": competition.main_color, "color": competition.bg_color, "fontWeight": "bolder"}) for t in get_stage_order(competition.code)]
+    )
 
 # create tabs that will contain each round
 tabs = []
 
 
 # Initialize app
-app = dash.Dash(__name__)
+# Callback and layout responses are compressed with gzip or brotli by Flask-Compress
+app = dash.Dash(__name__, compress=True)
 server = app.server
+register_live_routes(server, publisher, refresher.live_status)
+register_metrics(server)
+register_http_caching(server)
 app.title = "World Cup 2022 Dashboard"
 
 
-# App layout
-app.layout = html.Div(children=[
-    dcc.Store(id='component-cache', storage_type='memory'),
-    dcc.Tabs(id="tabs-main-container", className="tabs", children=[
-        dcc.Tab( id="FIFA-WORLD-CUP-MAIN-TAB", label="FIFA WORLD CUP", value="FIFA WORLD CUP", children=[
-            html.Div(style={"backgroundColor": WC_MAIN_BG_COLOR}, children=[
-                html.Div(
-                    html.Img(src="/assets/resources/2026-wc-banner.webp"), id="wc-image"
-                ),
-                html.Div(dcc.Tabs(id="wc-general-tabs", value=f"wc-tab-GROUP_STAGE", children=[dcc.Tab(id=f"wc-tab-{t}", label=f"{t.replace('_', ' ').title()}", value=f"wc-tab-{t}", style={"color": CL_MAIN_COLOR, "backgroundColor": WC_MAIN_BG_COLOR, "border": "none", "fontWeight": "bolder"}, selected_style={"backgroundColor": CL_MAIN_COLOR, "color": WC_MAIN_BG_COLOR, "fontWeight": "bolder"}) for t in stage_order["WC"]]),
-                className="tabs-container-wc", id="wc-tabs-container", style={"width": "100%"})])
+# App layout, served as a function so the competition tabs follow the registry and every page load starts with fresh stage tabs
+def serve_layout():
+    return html.Div(children=[
+        dcc.Tabs(id="tabs-main-container", className="tabs", value=next(iter(COMPETITIONS)), children=[
+            dcc.Tab(id=f"{c.code}-MAIN-TAB", label=c.name, value=c.code, children=[
+                html.Div(style={"backgroundColor": c.bg_color}, children=[
+                    html.Div(
+                        html.Img(src=get_asset_url(c.banner)), id=f"{c.code.lower()}-image"
+                    ),
+                    # Stage tabs are filled when the competition is opened, so its data is not loaded before that
+                    html.Div(className=f"tabs-container-{c.code.lower()}", id={"type": "stage-tabs-container", "competition": c.code}, style={"width": "100%"})])
+            ]) for c in COMPETITIONS.values()
         ]),
-        dcc.Tab( id="CHAMPIONS-LEAGUE-MAIN-TAB", label="2025/2026 CHAMPIONS LEAGUE", value="2025/2026 CHAMPIONS LEAGUE", children=[
-            html.Div(style={"backgroundColor": CL_MAIN_BG_COLOR}, children=[
-                html.Div(
-                    html.Img(src="/assets/resources/Champions-League.avif"), id="cl-image"
-                ),
-                html.Div(dcc.Tabs(id="cl-general-tabs", value=f"cl-tab-LEAGUE_STAGE", children=[dcc.Tab(id=f"cl-tab-{t}", label=f"{t.replace('_', ' ').title()}", value=f"cl-tab-{t}", style={"color": CL_MAIN_COLOR, "backgroundColor": CL_MAIN_BG_COLOR, "border": "none", "fontWeight": "bolder"}, selected_style={"backgroundColor": CL_MAIN_COLOR, "color": CL_MAIN_BG_COLOR, "fontWeight": "bolder"}) for t in stage_order["CL"]]),
-                className="tabs-container-cl", id="cl-tabs-container")])
-            ])
-        ]),
-        dcc.Loading(id="loading", children=[html.Div(id="tabs-content")]),
-        html.Div(id="callback-div"),
-        html.Footer(children=[
-            html.P("Data provided by Football-Data.org API. Dashboard created by Mauro Llanos.", style={"color": "#4287f5", "textAlign": "center", "padding": "10px"}),
-            html.Div(children=[
-                html.A("Check out my GitHub Repository", href="https://github.com/Mauriciollanos07", className="footer-link", target="_blank", rel="noopener noreferrer"),
-                html.A("Check out my Portfolio", href="https://portafolio-maurollanosdev.vercel.app/", className="footer-link", target="_blank", rel="noopener noreferrer")
-            ], className="footer-links-container")
-        ], className="footer")
-], className="main-container")
+            dcc.Loading(id="loading", children=[html.Div(id="tabs-content")]),
+            # Score deltas received by assets/live.js while a match is in progress
+            dcc.Store(id="live-scores"),
+            html.Div(id="callback-div"),
+            html.Footer(children=[
+                html.P("Data provided by Football-Data.org API. Dashboard created by Mauro Llanos.", style={"color": "#4287f5", "textAlign": "center", "padding": "10px"}),
+                html.Div(children=[
+                    html.A("Check out my GitHub Repository", href="https://github.com/Mauriciollanos07", className="footer-link", target="_blank", rel="noopener noreferrer"),
+                    html.A("Check out my Portfolio", href="https://portafolio-maurollanosdev.vercel.app/", className="footer-link", target="_blank", rel="noopener noreferrer")
+                ], className="footer-links-container")
+            ], className="footer")
+    ], className="main-container")
+
+
+app.layout = serve_layout
+
+@callback(
+    Output({"type": "stage-tabs-container", "competition": ALL}, 'children'),
+    Input('tabs-main-container', 'value'),
+    State({"type": "stage-tabs-container", "competition": ALL}, 'children'),
+    State({"type": "stage-tabs-container", "competition": ALL}, 'id')
+)
+def load_stage_tabs(tournament_tab, containers, ids):
+    # Only the opened competition gets its stage tabs, the ones already built are left as they are
+    return [
+        get_stage_tabs(COMPETITIONS[i["competition"]]) if i["competition"] == tournament_tab and not children else dash.no_update
+        for children, i in zip(containers, ids)
+    ]
+
 
 @callback(
     Output('loading', 'children'),
-    Output('component-cache', 'data'),
     Input('tabs-main-container', 'value'),
-    Input('wc-general-tabs', 'value'),
-    Input('cl-general-tabs', 'value'),
-    Input('component-cache', 'data')
+    Input({"type": "stage-tabs", "competition": ALL}, 'value'),
+    State({"type": "stage-tabs", "competition": ALL}, 'id')
 )
-def update_tab(tournament_tab, wc_tab, cl_tab, cache):
-    if cache is None:
-        cache = {}
-    
-    if not tournament_tab:
-        return html.H1("Select a tournament and stage to view the matches.", style={"color": "#4287f5", "textAlign": "center", "padding": "20px"}), cache
-    
-    # Create cache key
-    if tournament_tab == "FIFA WORLD CUP" and wc_tab:
-        cache_key = f"wc_{wc_tab}"
-        stage_code = wc_tab.split("-")[-1]
-        
-        if cache_key not in cache:
-            component = get_wc_stage_component(wc_df, stage_code, stage_labels["WC"][stage_code])
-            cache[cache_key] = component
-        return cache[cache_key], cache
+def update_tab(tournament_tab, stage_tabs, ids):
+    competition = COMPETITIONS.get(tournament_tab)
+    stage_code = next((value for value, i in zip(stage_tabs, ids) if i["competition"] == tournament_tab), None)
+    if competition is None or not stage_code:
+        return html.H1("Select a tournament and stage to view the matches.", style={"color": "#4287f5", "textAlign": "center", "padding": "20px"})
     
-    elif tournament_tab == "2025/2026 CHAMPIONS LEAGUE" and cl_tab:
-        cache_key = f"cl_{cl_tab}"
-        stage_code = cl_tab.split("-")[-1]
-        
-        if cache_key not in cache:
-            component = get_cl_stage_component(cl_df, stage_code, stage_labels["CL"][stage_code])
-            cache[cache_key] = component
-        return cache[cache_key], cache
-    
-    return html.H1("Select a tournament and stage to view the matches.", style={"color": "#4287f5", "textAlign": "center", "padding": "20px"}), cache
+    def build():
+        # Standings belong to the first phase of every competition (group stage or league stage)
+        with RENDER_SECONDS.time(competition=competition.code, stage=stage_code):
+            return competition.renderer(
+                snapshot.index, stage_code, get_stage_label(stage_code),
+                standings=get_standings(snapshot, stage_code) if stage_code == competition.default_stage else None,
+                code=competition.code
+            )
+
+    # Components are cached per (competition, stage, stage version) and shared by every session
+    set_response_labels(callback="update_tab", competition=competition.code, stage=stage_code)
+    with CALLBACK_SECONDS.time(callback="update_tab", competition=competition.code, stage=stage_code):
+        snapshot = get_snapshot(competition.code)
+        return component_cache.get_or_build((competition.code, stage_code, get_version(snapshot, stage_code)), build)
+
+
+@callback(
+    Output({"type": "match-day-content", "competition": MATCH, "stage": MATCH}, 'children'),
+    Input({"type": "match-day-tabs", "competition": MATCH, "stage": MATCH}, 'value'),
+    prevent_initial_call=True
+)
+def update_match_day(match_day):
+    # The stage component already carries its first match day, the others are rendered and cached when selected
+    code, stage_code = ctx.triggered_id["competition"], ctx.triggered_id["stage"]
+    competition = COMPETITIONS.get(code)
+    if competition is None or competition.match_day_renderer is None:
+        return dash.no_update
+
+    def build():
+        # Match days and standings are rendered by the functions of the competition that owns the tabs
+        with RENDER_SECONDS.time(competition=code, stage=stage_code):
+            if match_day == "standings":
+                return competition.standings_renderer(get_standings(snapshot, stage_code), get_stage_label(stage_code))
+            return competition.match_day_renderer(snapshot.index, stage_code, int(match_day), get_stage_label(stage_code))
+
+    set_response_labels(callback="update_match_day", competition=code, stage=stage_code)
+    with CALLBACK_SECONDS.time(callback="update_match_day", competition=code, stage=stage_code):
+        snapshot = get_snapshot(code)
+        if match_day == "standings":
+            return component_cache.get_or_build((code, stage_code, match_day, get_version(snapshot, stage_code)), build)
+        return component_cache.get_or_build(
+            (code, stage_code, int(match_day), get_version(snapshot, stage_code, int(match_day))), build
+        )
+
+
+# Live scores are applied to the rendered components with set_props, so React keeps owning the DOM
+clientside_callback(
+    ClientsideFunction(namespace="live", function_name="apply_deltas"),
+    Input("live-scores", "data"),
+    prevent_initial_call=True
+)
 
 
 # Run
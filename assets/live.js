@@ -0,0 +1,113 @@
+// Live score updates. A connection is only opened while /live/status reports a match in progress. Score deltas are written
+// to the live-scores store, and the apply_deltas clientside callback updates the tagged components with set_props, so the
+// rendered tree stays in the React state. Uses Server-Sent Events, or long polling when EventSource is not available.
+(function () {
+    var FIELDS = ['home', 'away', 'result'];
+    // Latest delta of every match seen since the page was loaded, sent as a whole so a skipped store update loses nothing
+    var latest = {};
+    // Stored versions seen per competition, e.g. "CL:7,WC:3", the same in every worker the browser may reconnect to
+    var since = '';
+
+    function stringifyId(id) {
+        // The DOM id Dash gives a component with a dictionary id
+        return '{' + Object.keys(id).sort().map(function (key) {
+            return JSON.stringify(key) + ':' + JSON.stringify(id[key]);
+        }).join(',') + '}';
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        live: {
+            apply_deltas: function (deltas) {
+                (deltas || []).forEach(function (delta) {
+                    var played = delta.home !== '' && delta.away !== '';
+                    FIELDS.forEach(function (field) {
+                        var id = {type: 'live-score', match: delta.id, field: field};
+                        // Only the components of the stage on screen exist, set_props needs a component of the layout
+                        var element = document.getElementById(stringifyId(id));
+                        if (!element || delta[field] === undefined) {
+                            return;
+                        }
+                        var props = {children: delta[field]};
+                        if (field === 'result') {
+                            props.className = played ? 'generic-text-4' : 'generic-text-3';
+                        }
+                        window.dash_clientside.set_props(id, props);
+                    });
+                });
+            }
+        }
+    });
+
+    function receive(deltas) {
+        deltas.forEach(function (delta) {
+            // A worker that loaded the shared snapshot late may still send an older version of a match
+            var held = latest[delta.id];
+            if (!held || delta.version >= held.version) {
+                latest[delta.id] = delta;
+            }
+        });
+        window.dash_clientside.set_props('live-scores', {data: Object.keys(latest).map(function (key) { return latest[key]; })});
+    }
+
+    function later(seconds) {
+        setTimeout(check, Math.max(seconds || 0, 5) * 1000);
+    }
+
+    function stream() {
+        var source = new EventSource('/live/stream?since=' + encodeURIComponent(since));
+        source.onmessage = function (event) {
+            since = event.lastEventId;
+            receive(JSON.parse(event.data));
+        };
+        // The server ends the stream once no match is in progress, EventSource would reconnect by itself
+        source.addEventListener('idle', function (event) {
+            source.close();
+            later(JSON.parse(event.data).retry);
+        });
+    }
+
+    function poll() {
+        fetch('/live/poll?since=' + encodeURIComponent(since), {cache: 'no-store'})
+            .then(function (response) { return response.json(); })
+            .then(function (body) {
+                since = body.since;
+                body.events.forEach(receive);
+                if (body.live) {
+                    poll();
+                } else {
+                    later(body.retry);
+                }
+            })
+            .catch(function () {
+                setTimeout(poll, 5000);
+            });
+    }
+
+    function check() {
+        fetch('/live/status', {cache: 'no-store'})
+            .then(function (response) { return response.json(); })
+            .then(function (status) {
+                if (!status.live) {
+                    later(status.retry);
+                } else if (window.EventSource) {
+                    stream();
+                } else {
+                    poll();
+                }
+            })
+            .catch(function () {
+                later(30);
+            });
+    }
+
+    function start() {
+        // Deltas are only written once the layout, and with it the live-scores store, has been rendered
+        if (!document.getElementById('tabs-main-container')) {
+            setTimeout(start, 500);
+            return;
+        }
+        check();
+    }
+
+    start();
+})();
@@ -0,0 +1,231 @@
+import random
+import zlib
+from datetime import datetime, timedelta, timezone
+
+# Knockout rounds named after the number of teams still in the competition
+ROUND_NAMES = {64: "LAST_64", 32: "LAST_32", 16: "LAST_16", 8: "QUARTER_FINALS", 4: "SEMI_FINALS", 2: "FINAL"}
+
+# Kickoff hours used to spread the matches of a day
+KICKOFF_HOURS = (13, 16, 19, 21)
+
+
+def _team(name):
+    return {"id": None if name is None else zlib.crc32(name.encode()) % 100000, "name": name, "shortName": name, "tla": None if name is None else name[:3].upper()}
+
+
+def _goals(rng):
+    # Rough distribution of the goals scored by one team in a match
+    return rng.choices(range(7), weights=(26, 34, 22, 11, 4, 2, 1))[0]
+
+
+def _score(rng, status, knockout):
+    """ This function returns the score dictionary of a match the way football-data.org reports it.
+        args:
+            rng (Random): The random generator of the payload.
+            status (str): FINISHED, IN_PLAY or a scheduled status.
+            knockout (bool): If True a draw after regular time goes to extra time and possibly to a penalty shootout.
+        returns:
+            dict: The score with its winner, duration and fullTime, halfTime, regularTime, extraTime and penalties parts.
+    """
+    empty = {"home": None, "away": None}
+    score = {"winner": None, "duration": "REGULAR", "fullTime": dict(empty), "halfTime": dict(empty)}
+    if status == "IN_PLAY":
+        score["fullTime"] = {"home": rng.randint(0, 2), "away": rng.randint(0, 2)}
+        score["halfTime"] = dict(score["fullTime"])
+        return score
+    if status != "FINISHED":
+        return score
+
+    home, away = _goals(rng), _goals(rng)
+    score["halfTime"] = {"home": rng.randint(0, home), "away": rng.randint(0, away)}
+    score["fullTime"] = {"home": home, "away": away}
+    if knockout and home == away:
+        score["regularTime"] = {"home": home, "away": away}
+        extra_home, extra_away = rng.choices((0, 1), weights=(3, 1))[0], rng.choices((0, 1), weights=(3, 1))[0]
+        score["extraTime"] = {"home": extra_home, "away": extra_away}
+        home, away = home + extra_home, away + extra_away
+        score["duration"] = "EXTRA_TIME"
+        if home == away:
+            # The full time score of a shootout includes the penalties, as in the API
+            penalties_home = rng.randint(2, 5)
+            penalties_away = penalties_home + rng.choice((-2, -1, 1))
+            score["penalties"] = {"home": penalties_home, "away": max(penalties_away, 0)}
+            home, away = home + penalties_home, away + max(penalties_away, 0)
+            score["duration"] = "PENALTY_SHOOTOUT"
+        score["fullTime"] = {"home": home, "away": away}
+    score["winner"] = "HOME_TEAM" if home > away else "AWAY_TEAM" if away > home else "DRAW"
+    return score
+
+
+def _fixture(date, stage, group, match_day, home, away):
+    return {"date": date, "stage": stage, "group": group, "matchday": match_day, "home": home, "away": away}
+
+
+def _kickoff(start, day, slot):
+    return start + timedelta(days=day, hours=KICKOFF_HOURS[slot % len(KICKOFF_HOURS)])
+
+
+def _group_name(i):
+    letters = ""
+    i += 1
+    while i:
+        i, rest = divmod(i - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+    return f"GROUP_{letters}"
+
+
+def _knockout_fixtures(rng, teams, qualifiers, start, day, two_legs, third_place):
+    # Teams of each round are drawn at random among all the teams, results of the previous round are not followed
+    fixtures = []
+    remaining = qualifiers
+    while remaining >= 2:
+        stage = ROUND_NAMES.get(remaining, f"LAST_{remaining}")
+        drawn = rng.sample(teams, remaining)
+        pairs = list(zip(drawn[::2], drawn[1::2]))
+        legs = 2 if two_legs and remaining > 2 else 1
+        for leg in range(legs):
+            for slot, (home, away) in enumerate(pairs):
+                if leg:
+                    home, away = away, home
+                fixtures.append(_fixture(_kickoff(start, day + slot // len(KICKOFF_HOURS), slot), stage, None, None, home, away))
+            day += max(len(pairs) // len(KICKOFF_HOURS), 1) + 6
+        if remaining == 4 and third_place:
+            home, away = rng.sample(teams, 2)
+            fixtures.append(_fixture(_kickoff(start, day, 0), "THIRD_PLACE", None, None, home, away))
+            day += 1
+        remaining //= 2
+    return fixtures, day
+
+
+def _build_matches(rng, fixtures, first_stage, progress, first_id, live):
+    """ This function turns a schedule into API matches, finishing the first fixtures in date order.
+    Knockout rounds that follow a round not finished yet get TBD teams, like the API before the draw.
+        args:
+            rng (Random): The random generator of the payload.
+            fixtures (list): The fixtures built by _fixture.
+            first_stage (str): The stage code of the first phase, whose matches never go to extra time.
+            progress (float): Fraction of the matches already played, between 0 and 1.
+            first_id (int): Id of the first match.
+            live (int): Number of matches in progress right after the last finished one.
+        returns:
+            list: The matches as returned in the "matches" list of the API.
+    """
+    fixtures = sorted(fixtures, key=lambda f: f["date"])
+    played = int(round(len(fixtures) * progress))
+    statuses = ["FINISHED"] * played + ["IN_PLAY"] * min(live, len(fixtures) - played)
+    statuses += ["TIMED"] * (len(fixtures) - len(statuses))
+
+    # A knockout round is drawn once every match of the rounds before it is finished
+    unfinished = set()
+    stage_order = list(dict.fromkeys(f["stage"] for f in fixtures))
+    for fixture, status in zip(fixtures, statuses):
+        if status != "FINISHED":
+            unfinished.add(fixture["stage"])
+    drawn = set()
+    for stage in stage_order:
+        drawn.add(stage)
+        if stage in unfinished:
+            break
+
+    matches = []
+    for i, (fixture, status) in enumerate(zip(fixtures, statuses)):
+        known = fixture["stage"] == first_stage or fixture["stage"] in drawn
+        home, away = (fixture["home"], fixture["away"]) if known else (None, None)
+        # A match of a round not drawn yet can not be in progress
+        status = status if known else "TIMED"
+        matches.append({
+            "id": first_id + i,
+            "utcDate": fixture["date"].strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "status": status,
+            "matchday": fixture["matchday"],
+            "stage": fixture["stage"],
+            "group": fixture["group"],
+            "lastUpdated": fixture["date"].strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "homeTeam": _team(home),
+            "awayTeam": _team(away),
+            "score": _score(rng, status, fixture["stage"] != first_stage),
+        })
+    return matches
+
+
+def generate_wc_matches(teams=48, progress=0.8, live=2, seed=0, start=None, first_id=1):
+    """ This function generates the matches of a World Cup with groups of four teams followed by single match knockout rounds.
+        args:
+            teams (int): Number of teams, a multiple of 4. 48 gives 12 groups and a round of 32.
+            progress (float): Fraction of the matches already played, between 0 and 1.
+            live (int): Number of matches in progress.
+            seed (int): Seed of the random generator, the same arguments always give the same payload.
+            start (datetime): Date of the first match day.
+            first_id (int): Id of the first match.
+        returns:
+            list: The matches as returned in the "matches" list of the API.
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2026, 6, 11, tzinfo=timezone.utc)
+    names = [f"WC Nation {i + 1:03d}" for i in range(teams)]
+    fixtures = []
+    # Every team of a group plays the three others, two matches of the group on each of the three match days
+    rounds = (((0, 1), (2, 3)), ((0, 2), (1, 3)), ((0, 3), (1, 2)))
+    for g in range(teams // 4):
+        group = names[4 * g:4 * g + 4]
+        for match_day, pairs in enumerate(rounds, start=1):
+            for slot, (home, away) in enumerate(pairs):
+                day = (match_day - 1) * 5 + g // 2
+                fixtures.append(_fixture(_kickoff(start, day, 2 * g + slot), "GROUP_STAGE", _group_name(g), match_day, group[home], group[away]))
+
+    # The knockout phase starts with the largest power of two that is at most two thirds of the teams
+    qualifiers = 2
+    while qualifiers * 2 <= teams * 2 // 3:
+        qualifiers *= 2
+    knockouts, _ = _knockout_fixtures(rng, names, qualifiers, start, 3 * 5 + teams // 8, two_legs=False, third_place=True)
+    return _build_matches(rng, fixtures + knockouts, "GROUP_STAGE", progress, first_id, live)
+
+
+def generate_cl_matches(teams=36, match_days=8, progress=0.995, live=2, seed=0, start=None, first_id=1):
+    """ This function generates the matches of a Champions League season with a single league phase followed by a play-off round
+    and two legged knockout rounds up to a single match final.
+        args:
+            teams (int): Number of teams of the league phase, an even number.
+            match_days (int): Number of match days of the league phase.
+            progress (float): Fraction of the matches already played, between 0 and 1. The default draws every knockout round
+                and leaves the final in play, below about 0.7 the knockout rounds are not drawn and render no tie.
+            live (int): Number of matches in progress.
+            seed (int): Seed of the random generator, the same arguments always give the same payload.
+            start (datetime): Date of the first match day.
+            first_id (int): Id of the first match.
+        returns:
+            list: The matches as returned in the "matches" list of the API.
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2025, 9, 16, tzinfo=timezone.utc)
+    names = [f"CL Club {i + 1:03d}" for i in range(teams)]
+    fixtures = []
+    for match_day in range(1, match_days + 1):
+        # Pairs are drawn again for every match day, a pair may meet twice like in a real draw with constraints
+        drawn = rng.sample(names, teams)
+        for slot, (home, away) in enumerate(zip(drawn[::2], drawn[1::2])):
+            fixtures.append(_fixture(_kickoff(start, (match_day - 1) * 14 + slot // 9, slot), "LEAGUE_STAGE", None, match_day, home, away))
+
+    knockouts, _ = _knockout_fixtures(rng, names, 32, start, match_days * 14 + 21, two_legs=True, third_place=False)
+    # The first knockout round of the league format is the play-off round
+    for fixture in knockouts:
+        if fixture["stage"] == "LAST_32":
+            fixture["stage"] = "PLAYOFFS"
+    return _build_matches(rng, fixtures + knockouts, "LEAGUE_STAGE", progress, first_id, live)
+
+
+def generate_history_matches(seasons=50, teams=36, seed=0):
+    """ This function generates several finished Champions League seasons in one payload, with ids and dates following each other.
+    50 seasons of 36 teams give about 10,000 matches.
+        args:
+            seasons (int): Number of seasons.
+            teams (int): Number of teams of every league phase.
+            seed (int): Seed of the random generator.
+        returns:
+            list: The matches of every season, as returned in the "matches" list of the API.
+    """
+    matches = []
+    for season in range(seasons):
+        start = datetime(2025 - seasons + season, 9, 16, tzinfo=timezone.utc)
+        matches.extend(generate_cl_matches(teams=teams, progress=1, live=0, seed=seed + season, start=start, first_id=len(matches) + 1))
+    return matches
@@ -0,0 +1,353 @@
+import argparse
+import fnmatch
+import gc
+import gzip
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.payloads import generate_wc_matches, generate_cl_matches, generate_history_matches
+from benchmarks.stub_api import StubFootballDataAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# Metrics compared with the baseline, and the tolerance argument that applies to each of them
+GATED_METRICS = {"median": "tolerance", "peak_kib": "memory_tolerance", "bytes": "memory_tolerance"}
+
+# Texts of the components rendered instead of a stage when it has no data or its renderer failed
+PLACEHOLDERS = ("No data available", "No matches available", "No standings available", "Error loading")
+
+
+def measure(function, repeat):
+    """ This function times a function the way timeit does and measures its peak memory in a separate run.
+    A first call warms up caches and imports, the timed calls run with the garbage collector disabled, and the peak of the
+    memory allocated by Python during one more call is taken with tracemalloc, which would slow down the timed calls.
+        args:
+            function (function): The function to measure, without arguments.
+            repeat (int): Number of timed calls.
+        returns:
+            dict: The median and min seconds of the timed calls and the peak memory in KiB.
+    """
+    function()
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"median": statistics.median(times), "min": min(times), "peak_kib": peak / 1024}
+
+
+def _label(stage):
+    return stage.replace("_", " ").title()
+
+
+def check_rendered(name, data):
+    """ This function makes sure a benchmark rendered the stage and not a placeholder, which would be timed instead.
+        args:
+            name (str): The benchmark name.
+            data (Component or bytes): The rendered component or the body of the callback response.
+        raises:
+            RuntimeError: If the output is a placeholder or an error message.
+    """
+    import plotly.utils
+
+    text = data.decode() if isinstance(data, bytes) else json.dumps(data, cls=plotly.utils.PlotlyJSONEncoder)
+    for placeholder in PLACEHOLDERS:
+        if placeholder in text:
+            raise RuntimeError(f"{name} rendered the placeholder {placeholder!r}, the payload has nothing to show for it")
+
+
+def get_payloads(args):
+    """ This function generates the payloads of the run, the same arguments always give the same matches. """
+    return {
+        "WC": generate_wc_matches(teams=args.wc_teams, seed=args.seed),
+        "CL": generate_cl_matches(teams=args.cl_teams, seed=args.seed),
+        "HISTORY": generate_history_matches(seasons=args.seasons, teams=args.cl_teams, seed=args.seed),
+    }
+
+
+def run_data_benchmarks(payloads, args, selected):
+    """ This function measures normalization, index construction, standings, diffing and every stage renderer of each payload.
+        args:
+            payloads (dict): The raw matches keyed by WC, CL and HISTORY.
+            args (Namespace): The command line arguments.
+            selected (function): Tells whether a benchmark name was selected with --only.
+        returns:
+            dict: The results keyed by benchmark name.
+    """
+    from functions import normalize_matches_wc, normalize_matches_cl, get_wc_stage_component, get_cl_stage_component, \
+        get_cl_match_day_component, get_cl_standings_component
+    from match_index import MatchIndex
+    from match_diff import diff_matches
+    from standings import compute_standings
+
+    # The history is a long Champions League payload, rendered with the Champions League components
+    setups = {
+        "WC": (normalize_matches_wc, get_wc_stage_component, "GROUP_STAGE"),
+        "CL": (normalize_matches_cl, get_cl_stage_component, "LEAGUE_STAGE"),
+        "HISTORY": (normalize_matches_cl, get_cl_stage_component, "LEAGUE_STAGE"),
+    }
+    results = {}
+
+    def bench(name, function, rendered=False):
+        if selected(name):
+            if rendered:
+                check_rendered(name, function())
+            results[name] = measure(function, args.repeat)
+            report(name, results[name])
+
+    for code, matches in payloads.items():
+        normalizer, renderer, first_stage = setups[code]
+        bench(f"normalize/{code}", lambda: normalizer(matches))
+        df = normalizer(matches)
+        if f"normalize/{code}" in results:
+            results[f"normalize/{code}"]["rows"] = len(df)
+        bench(f"index/{code}", lambda: MatchIndex(df))
+        index = MatchIndex(df)
+
+        # A refresh where the live matches scored once more
+        updated = [dict(m, score=dict(m["score"], fullTime={"home": (m["score"]["fullTime"]["home"] or 0) + 1, "away": m["score"]["fullTime"]["away"] or 0}))
+                   if m["status"] == "IN_PLAY" else m for m in matches]
+        updated_df = normalizer(updated)
+        bench(f"diff/{code}", lambda: diff_matches(df, updated_df))
+
+        bench(f"standings/{code}", lambda: compute_standings(index.stage(first_stage)))
+        standings = compute_standings(index.stage(first_stage))
+        for stage in index.stages:
+            stage_standings = standings if stage == first_stage else None
+            bench(f"render/{code}/{stage}", lambda: renderer(index, stage, _label(stage), standings=stage_standings), rendered=True)
+        if first_stage == "LEAGUE_STAGE" and index.matchdays(first_stage):
+            last_day = index.matchdays(first_stage)[-1]
+            bench(f"render/{code}/{first_stage}/match-day", lambda: get_cl_match_day_component(index, first_stage, last_day, _label(first_stage)), rendered=True)
+            bench(f"render/{code}/{first_stage}/standings", lambda: get_cl_standings_component(standings, _label(first_stage)), rendered=True)
+    return results
+
+
+def _post_callback(client, body):
+    resp = client.post("/_dash-update-component", json=body)
+    if resp.status_code != 200:
+        raise RuntimeError(f"Callback {body['output']} answered {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+    return resp.get_data()
+
+
+def _stage_tab_body(code, stage):
+    stage_tabs_id = {"competition": code, "type": "stage-tabs"}
+    return {
+        "output": "loading.children",
+        "outputs": {"id": "loading", "property": "children"},
+        "inputs": [
+            {"id": "tabs-main-container", "property": "value", "value": code},
+            [{"id": stage_tabs_id, "property": "value", "value": stage}],
+        ],
+        "state": [[{"id": stage_tabs_id, "property": "id", "value": stage_tabs_id}]],
+        "changedPropIds": [json.dumps(stage_tabs_id, separators=(",", ":"), sort_keys=True) + ".value"],
+    }
+
+
+def _match_day_body(code, stage, match_day):
+    content_id = {"competition": code, "stage": stage, "type": "match-day-content"}
+    tabs_id = {"competition": code, "stage": stage, "type": "match-day-tabs"}
+    wildcard_id = {"competition": ["MATCH"], "stage": ["MATCH"], "type": "match-day-content"}
+    return {
+        "output": json.dumps(wildcard_id, separators=(",", ":"), sort_keys=True) + ".children",
+        "outputs": {"id": content_id, "property": "children"},
+        "inputs": [{"id": tabs_id, "property": "value", "value": str(match_day)}],
+        "changedPropIds": [json.dumps(tabs_id, separators=(",", ":"), sort_keys=True) + ".value"],
+    }
+
+
+def run_callback_benchmarks(stub, args, selected):
+    """ This function imports the app against the stub API and measures the stage callbacks through the Flask test client.
+    The component cache is cleared before every call, so the time covers the render and the JSON serialization of the response.
+        args:
+            stub (StubFootballDataAPI): The running stub serving the WC and CL payloads.
+            args (Namespace): The command line arguments.
+            selected (function): Tells whether a benchmark name was selected with --only.
+        returns:
+            dict: The results keyed by benchmark name, with the size of each response in bytes and gzipped.
+    """
+    os.environ.update({
+        "API_TOKEN": "benchmark",
+        "API_URL_MATCHES_WC": stub.url("WC"),
+        "API_URL_MATCHES_CL": stub.url("CL"),
+        "SNAPSHOT_DIR": tempfile.mkdtemp(prefix="football-snapshots-"),
+        "REFRESH_INTERVAL": "3600",
+        "LIVE_REFRESH_INTERVAL": "3600",
+    })
+    import app
+
+    client = app.server.test_client()
+    client.get("/")
+    requests = []
+    for code in ("WC", "CL"):
+        snapshot = app.get_snapshot(code)
+        for stage in snapshot.stages:
+            requests.append((f"callback/{code}/{stage}", _stage_tab_body(code, stage)))
+        if "LEAGUE_STAGE" in snapshot.stages and snapshot.index.matchdays("LEAGUE_STAGE"):
+            last_day = snapshot.index.matchdays("LEAGUE_STAGE")[-1]
+            requests.append((f"callback/{code}/LEAGUE_STAGE/match-day", _match_day_body(code, "LEAGUE_STAGE", last_day)))
+            requests.append((f"callback/{code}/LEAGUE_STAGE/standings", _match_day_body(code, "LEAGUE_STAGE", "standings")))
+
+    results = {}
+    for name, body in requests:
+        if not selected(name):
+            continue
+
+        def call():
+            app.component_cache.clear()
+            return _post_callback(client, body)
+
+        check_rendered(name, call())
+        results[name] = measure(call, args.repeat)
+        data = call()
+        results[name].update({"bytes": len(data), "gzip_bytes": len(gzip.compress(data))})
+        report(name, results[name])
+    app.refresher.stop()
+    return results
+
+
+def run_startup_benchmark(stub, args):
+    """ This function measures the cold startup of the app in fresh processes: interpreter start, imports, and the first load
+    of both competitions from the stub API with an empty snapshot directory.
+        args:
+            stub (StubFootballDataAPI): The running stub serving the WC and CL payloads.
+            args (Namespace): The command line arguments.
+        returns:
+            dict: The median and min seconds of the runs, and the largest resident set size of the processes in KiB.
+    """
+    script = "import app; app.get_snapshot('WC'); app.get_snapshot('CL'); app.refresher.stop()"
+    times = []
+    for _ in range(args.startup_runs):
+        env = dict(os.environ, API_TOKEN="benchmark", API_URL_MATCHES_WC=stub.url("WC"), API_URL_MATCHES_CL=stub.url("CL"),
+                   SNAPSHOT_DIR=tempfile.mkdtemp(prefix="football-snapshots-"), REFRESH_INTERVAL="3600", LIVE_REFRESH_INTERVAL="3600")
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True)
+        times.append(time.perf_counter() - start)
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    result = {"median": statistics.median(times), "min": min(times), "peak_rss_kib": peak}
+    report("startup/cold", result)
+    return result
+
+
+def report(name, result):
+    parts = [f"{name:<52}"]
+    if "median" in result:
+        parts.append(f"median {result['median'] * 1000:10.3f} ms  min {result['min'] * 1000:10.3f} ms")
+    if "peak_kib" in result:
+        parts.append(f"peak {result['peak_kib']:10.1f} KiB")
+    if "peak_rss_kib" in result:
+        parts.append(f"max rss {result['peak_rss_kib']:10.0f} KiB")
+    if "bytes" in result:
+        parts.append(f"response {result['bytes']:9d} B ({result['gzip_bytes']} B gzipped)")
+    print("  ".join(parts), flush=True)
+
+
+def compare(results, baseline, args):
+    """ This function compares the results of a run with a baseline.
+        args:
+            results (dict): The results of the run keyed by benchmark name.
+            baseline (dict): The results saved by --save-baseline.
+            args (Namespace): The command line arguments, with the tolerances.
+        returns:
+            list: One message per metric worse than its baseline by more than its tolerance.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, tolerance in GATED_METRICS.items():
+            if metric not in result or not base.get(metric):
+                continue
+            limit = base[metric] * (1 + getattr(args, tolerance))
+            if result[metric] > limit:
+                regressions.append(f"{name} {metric}: {result[metric]:.6g} > {base[metric]:.6g} (+{result[metric] / base[metric] - 1:.0%})")
+    return regressions
+
+
+def get_config(args):
+    # Results are only comparable with a baseline taken at the same scale
+    return {"wc_teams": args.wc_teams, "cl_teams": args.cl_teams, "seasons": args.seasons, "seed": args.seed, "repeat": args.repeat}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the football dashboard against synthetic football-data.org payloads.")
+    parser.add_argument("--wc-teams", type=int, default=48, help="Teams of the World Cup payload, a multiple of 4.")
+    parser.add_argument("--cl-teams", type=int, default=36, help="Teams of the Champions League league phase.")
+    parser.add_argument("--seasons", type=int, default=50, help="Champions League seasons of the history payload.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the payload generator.")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed calls per benchmark.")
+    parser.add_argument("--startup-runs", type=int, default=3, help="Processes started to measure the cold startup.")
+    parser.add_argument("--only", action="append", help="Run the benchmarks matching this glob, e.g. 'render/*'. Can be repeated.")
+    parser.add_argument("--skip-app", action="store_true", help="Skip the callback and startup benchmarks that import the app.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare with or to save.")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown of the median time, 0.25 is 25%%.")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="Allowed growth of peak memory and response sizes.")
+    parser.add_argument("--output", help="Also write the results of the run to this JSON file.")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+
+    def selected(name):
+        return not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)
+
+    print(f"Python {platform.python_version()} on {platform.platform()}, config {get_config(args)}", flush=True)
+    payloads = get_payloads(args)
+    results = run_data_benchmarks(payloads, args, selected)
+    if not args.skip_app:
+        # A large rate limit keeps the stub from throttling the repeated startups
+        with StubFootballDataAPI({"WC": payloads["WC"], "CL": payloads["CL"]}, requests_per_minute=10000) as stub:
+            if selected("startup/cold"):
+                results["startup/cold"] = run_startup_benchmark(stub, args)
+            results.update(run_callback_benchmarks(stub, args, selected))
+
+    document = {"config": get_config(args), "python": platform.python_version(), "platform": platform.platform(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        # Without a baseline nothing is gated, which must not pass for a successful gate
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+        return 2
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != get_config(args):
+        print(f"Baseline config {baseline.get('config')} differs from this run, results are not compared")
+        return 2
+    regressions = compare(results, baseline["results"], args)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    print(f"{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Path of the matches of a competition, as in https://api.football-data.org/v4/competitions/<code>/matches
+MATCHES_PATH = re.compile(r"^/v4/competitions/(?P<code>[A-Za-z0-9]+)/matches/?$")
+
+
+class StubFootballDataAPI:
+    """ Local HTTP server imitating the matches endpoint of football-data.org, so benchmarks run without network or token.
+    Every payload is encoded once with a strong ETag and a Last-Modified date, conditional requests get a 304, and every
+    response carries the X-Requests-Available-Minute and X-RequestCounter-Reset headers of the API. Requests beyond
+    requests_per_minute in the current minute get a 429, like the free tier.
+    """
+
+    def __init__(self, payloads=None, requests_per_minute=1000, latency=0.0, host="127.0.0.1", port=0):
+        self.requests_per_minute = requests_per_minute
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self._bodies = {}
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._lock = threading.Lock()
+        for code, matches in (payloads or {}).items():
+            self.set_matches(code, matches)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def set_matches(self, code, matches):
+        """ This function replaces the matches served for a competition, giving them a new ETag and Last-Modified date. """
+        body = json.dumps({"matches": matches}).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        with self._lock:
+            self._bodies[code] = (body, etag, formatdate(usegmt=True))
+
+    def url(self, code):
+        """ This function returns the URL of the matches of a competition, to use as API_URL_MATCHES_<code>. """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v4/competitions/{code}/matches"
+
+    def start(self):
+        """ This function serves requests in a background thread and returns the stub. """
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-football-data", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ This function stops the server and closes its socket. """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _take_request(self):
+        # Fixed one minute window, as reported by the API counter headers
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 60:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            self.requests += 1
+            available = self.requests_per_minute - self._window_count
+            reset = max(int(60 - (now - self._window_start)), 0)
+            return available, reset
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                available, reset = stub._take_request()
+                if stub.latency:
+                    time.sleep(stub.latency)
+                limits = {"X-Requests-Available-Minute": max(available, 0), "X-RequestCounter-Reset": reset}
+                if available < 0:
+                    return self._reply(429, b'{"message": "You reached your request limit."}', limits)
+
+                match = MATCHES_PATH.match(self.path.split("?", 1)[0])
+                with stub._lock:
+                    entry = stub._bodies.get(match.group("code")) if match else None
+                if entry is None:
+                    return self._reply(404, b'{"message": "The resource you are looking for does not exist."}', limits)
+
+                body, etag, last_modified = entry
+                validators = {"ETag": etag, "Last-Modified": last_modified}
+                if self.headers.get("If-None-Match") == etag or (
+                        self.headers.get("If-None-Match") is None and self.headers.get("If-Modified-Since") == last_modified):
+                    with stub._lock:
+                        stub.not_modified += 1
+                    return self._reply(304, b"", {**limits, **validators})
+                return self._reply(200, body, {**limits, **validators})
+
+            def _reply(self, status, body, headers):
+                self.send_response(status)
+                if status != 304:
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, str(value))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS
+
+# Maximum number of rendered stage components kept in memory by each server process
+COMPONENT_CACHE_SIZE = int(os.environ.get('COMPONENT_CACHE_SIZE', 64))
+
+
+class LRUCache:
+    """ Thread safe, size bounded cache that evicts the least recently used entry when full.
+    It is shared by every session served by the process, so a stage component is built once per data version.
+    """
+
+    def __init__(self, maxsize=COMPONENT_CACHE_SIZE, name="components"):
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ This function returns the value stored for key and marks it as the most recently used, or default if missing. """
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        """ This function stores value under key, evicting the least recently used entries beyond maxsize. """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        """ This function returns the cached value for key, calling build() and caching its result on a miss.
+            args:
+                key (hashable): The cache key.
+                build (function): A function without arguments that creates the value.
+            returns:
+                The cached or newly built value.
+        """
+        value = self.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return value
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        value = build()
+        self.put(key, value)
+        return value
+
+    def discard(self, predicate):
+        """ This function removes every entry whose key satisfies predicate(key). """
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        """ This function removes every entry from the cache. """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
@@ -0,0 +1,60 @@
+import os
+from collections import namedtuple
+
+from functions import normalize_matches_wc, normalize_matches_cl, get_wc_stage_component, get_cl_stage_component, \
+    get_cl_match_day_component, get_cl_standings_component
+from constants import WC_PRIMARY_COLOR, WC_MAIN_BG_COLOR, WC_MAIN_COLOR, CL_PRIMARY_COLOR, CL_MAIN_BG_COLOR, CL_MAIN_COLOR
+
+# Everything the app needs to know about a competition. Adding a competition to the dashboard means adding an entry to
+# COMPETITIONS and setting the API_URL_MATCHES_<code> environment variable, its data is only fetched the first time it is opened.
+Competition = namedtuple("Competition", [
+    "code",           # Short code used in cache keys, component ids and the API URL variable name
+    "name",           # Label of the main tab
+    "url",            # API URL returning the matches of the competition
+    "normalizer",     # Function turning the raw matches into a normalized match DataFrame
+    "renderer",       # Function building the component of a stage from the MatchIndex
+    "match_day_renderer",  # Function building one match day of a stage with match day tabs, None if the renderer has none
+    "standings_renderer",  # Function building the standings tab of a stage with match day tabs, None if the renderer has none
+    "default_stage",  # Stage selected when the competition is opened
+    "banner",         # Image shown above the stage tabs
+    "primary_color",
+    "bg_color",
+    "main_color",
+])
+
+
+def get_competition_url(code):
+    """ This function returns the API URL of a competition from the API_URL_MATCHES_<code> environment variable. """
+    return os.environ.get(f'API_URL_MATCHES_{code}')
+
+
+COMPETITIONS = {c.code: c for c in [
+    Competition(
+        code="WC",
+        name="FIFA WORLD CUP",
+        url=get_competition_url("WC"),
+        normalizer=normalize_matches_wc,
+        renderer=get_wc_stage_component,
+        match_day_renderer=None,
+        standings_renderer=None,
+        default_stage="GROUP_STAGE",
+        banner="/assets/resources/2026-wc-banner.webp",
+        primary_color=WC_PRIMARY_COLOR,
+        bg_color=WC_MAIN_BG_COLOR,
+        main_color=WC_MAIN_COLOR,
+    ),
+    Competition(
+        code="CL",
+        name="2025/2026 CHAMPIONS LEAGUE",
+        url=get_competition_url("CL"),
+        normalizer=normalize_matches_cl,
+        renderer=get_cl_stage_component,
+        match_day_renderer=get_cl_match_day_component,
+        standings_renderer=get_cl_standings_component,
+        default_stage="LEAGUE_STAGE",
+        banner="/assets/resources/Champions-League.avif",
+        primary_color=CL_PRIMARY_COLOR,
+        bg_color=CL_MAIN_BG_COLOR,
+        main_color=CL_MAIN_COLOR,
+    ),
+]}
@@ -1,170 +1,343 @@
+import logging
+import numpy as np
+import os
 import pandas as pd
+import pyarrow as pa
 import dash
-from dash import dcc, html
-import math
+from dash import dcc, html, dash_table
+from match_index import INDEX_ORDER
+from standings import STANDINGS_COLUMNS, compute_standings
 from constants import WC_PRIMARY_COLOR, WC_MAIN_BG_COLOR, WC_MAIN_COLOR, CL_PRIMARY_COLOR, CL_MAIN_BG_COLOR, CL_MAIN_COLOR
 
-def get_mathces_list_wc (jason_file):
-    """ This function takes the JSON response from the API and returns a list of dictionaries with the relevant match information for the World Cup. 
-    It handles both group stage matches and knockout stage matches, including those that went to penalties. 
+logger = logging.getLogger(__name__)
+
+# Results tables are rendered as HTML tables ("html") or as a virtualized, sortable and filterable DataTable ("grid")
+TABLE_MODE = os.environ.get('TABLE_MODE', 'html')
+
+
+# Columns and dtypes of the normalized match frame shared by every competition. Columns are backed by Arrow arrays, so a frame
+# read from a memory-mapped snapshot file keeps pointing at the file instead of being copied into every worker, missing values
+# are pd.NA. Stage, group and status are categoricals, whose small integer codes are the only part copied.
+MATCH_COLUMNS = {
+    "Id": pd.ArrowDtype(pa.int64()),
+    "Date": pd.ArrowDtype(pa.timestamp("ns", tz="UTC")),
+    "Stage": "category",
+    "Group": "category",
+    "Match Day": pd.ArrowDtype(pa.int64()),
+    "Status": "category",
+    "Home Team": pd.ArrowDtype(pa.string()),
+    "Away Team": pd.ArrowDtype(pa.string()),
+    "Home Score": pd.ArrowDtype(pa.int64()),
+    "Away Score": pd.ArrowDtype(pa.int64()),
+    "Home Penalties": pd.ArrowDtype(pa.int64()),
+    "Away Penalties": pd.ArrowDtype(pa.int64()),
+    "Winner": pd.ArrowDtype(pa.string()),
+    "Date Text": pd.ArrowDtype(pa.string()),
+    "Home Score Text": pd.ArrowDtype(pa.string()),
+    "Away Score Text": pd.ArrowDtype(pa.string()),
+}
+
+# Columns of the normalized frame holding the display strings of the results table columns, formatted once per snapshot
+DISPLAY_COLUMNS = {"Date": "Date Text", "Home Score": "Home Score Text", "Away Score": "Away Score Text"}
+
+
+def empty_matches_frame():
+    """ This function returns an empty match frame with the normalized columns and dtypes, used when a competition has no valid matches. """
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in MATCH_COLUMNS.items()})
+
+
+def _normalize_matches(jason_file, competition, first_stage):
+    """ This function turns the matches of an API response into a typed DataFrame using column operations instead of a loop per match.
+    Knockout matches that went past regular time get their score from regular time plus extra time, and a penalty shootout is kept
+    apart in the penalties columns, since the full time score of the API includes the shootout goals.
+    Rows that can not be parsed (not a dictionary, missing or invalid date or stage, non integer scores) are logged and dropped one by one,
+    the rest of the competition is kept.
         args:
             jason_file (list): A list of dictionaries containing match data from the API response.
+            competition (str): The competition name used when reporting dropped rows.
+            first_stage (str): The stage code of the first phase (group or league stage), whose matches have no winner.
         returns:
-            list: A list of dictionaries with the following keys: "Date", "Stage", "Group", "Home Team", "Away Team", "Home Score", "Away Score", "Winner". The "Group" key will be None for knockout stage matches. 
-            The "Winner" key will be an empty string for group stage matches and will contain the name of the winning team for knockout stage matches. 
-            The "Home Score" and "Away Score" keys will contain the regular time score for group stage matches and the combined regular time and extra time score for knockout stage matches. 
-            If a match went to penalties, the "Home Score" and "Away Score" keys will also include the penalties score in parentheses. If there is an error processing the data, the function will return an empty list.
+            DataFrame: A DataFrame with the columns of MATCH_COLUMNS, including the display strings of DISPLAY_COLUMNS, sorted in the
+            INDEX_ORDER of MatchIndex. The ids of the dropped matches are kept in df.attrs["dropped"].
     """
-    try:
-        list = []
-        for match in jason_file:
-            date = match['utcDate'][:10]
-            stage = match.get('stage')
-            group = match.get('group')
-            home_team = match['homeTeam']['name']
-            away_team = match['awayTeam']['name']
-            # if match is from group stage set penalties to false
-            if stage == 'GROUP_STAGE' or match['score']['duration'] == 'REGULAR':
-                home_score = match['score']['fullTime']['home']
-                away_score = match['score']['fullTime']['away']
-                home_penalties_score = False
-                away_penalties_score = False
-            # If game had penalties, separate game time score (regular time and extra time) from penalties score
-            else:
-                home_score = match['score']['regularTime']['home'] + match['score']['extraTime']['home']
-                away_score = match['score']['regularTime']['away'] + match['score']['extraTime']['away']
-                home_penalties_score = match['score']['penalties']['home']
-                away_penalties_score = match['score']['penalties']['away']
-            winner_flag = match['score'].get('winner')
-            winner = ''
-            if stage != 'GROUP_STAGE':
-                if winner_flag == 'HOME_TEAM':
-                    winner = home_team
-                elif winner_flag == 'AWAY_TEAM':
-                    winner = away_team
-            # Format score depending on penalties shootout
-            if home_penalties_score != False:
-                home_score = f"{home_score} ({home_penalties_score})"
-                away_score = f"{away_score} ({away_penalties_score})"
-            match_dict = {
-                "Date": date,
-                "Stage": stage,
-                "Group": group,
-                "Home Team": home_team,
-                "Away Team": away_team,
-                "Home Score": home_score,
-                "Away Score": away_score,
-                "Winner": winner
-            }
-            list.append(match_dict)
-        return list
-    except Exception:
-        return []
+    records = [match for match in jason_file if isinstance(match, dict)]
+    dropped = len(jason_file) - len(records)
+    if not records:
+        if dropped:
+            logger.warning("Dropped %d malformed %s matches", dropped, competition)
+        return empty_matches_frame()
+
+    raw = pd.json_normalize(records)
+    missing = pd.Series(None, index=raw.index, dtype=object)
+    bad = pd.Series(False, index=raw.index)
+
+    def column(name):
+        return raw[name] if name in raw else missing
+
+    def integers(name):
+        # Non numeric or fractional values flag the row as malformed instead of failing the whole competition
+        nonlocal bad
+        values = column(name)
+        numbers = pd.to_numeric(values, errors="coerce")
+        invalid = (values.notna() & numbers.isna()) | (numbers.notna() & (numbers % 1 != 0))
+        bad |= invalid
+        return numbers.where(~invalid).astype("Int64")
+
+    def names(name):
+        values = column(name)
+        return values.astype(object).where(values.notna(), None)
+
+    # ISO8601 accepts every shape of timestamp the API may send (with or without fractional seconds), instead of guessing the format of the first row
+    date = pd.to_datetime(column("utcDate"), utc=True, errors="coerce", format="ISO8601")
+    stage = column("stage")
+    bad |= date.isna() | stage.isna()
+
+    home_score = integers("score.fullTime.home")
+    away_score = integers("score.fullTime.away")
+    home_penalties = integers("score.penalties.home")
+    away_penalties = integers("score.penalties.away")
+    # Matches past regular time show regular time plus extra time, the shootout is kept apart
+    extended = (stage != first_stage) & (column("score.duration").fillna("REGULAR") != "REGULAR")
+    home_extended = (integers("score.regularTime.home") + integers("score.extraTime.home").fillna(0)).fillna(home_score - home_penalties.fillna(0))
+    away_extended = (integers("score.regularTime.away") + integers("score.extraTime.away").fillna(0)).fillna(away_score - away_penalties.fillna(0))
+    home_score = home_score.where(~extended, home_extended)
+    away_score = away_score.where(~extended, away_extended)
+    shootout = column("score.duration") == "PENALTY_SHOOTOUT"
+    home_penalties = home_penalties.where(shootout)
+    away_penalties = away_penalties.where(shootout)
+
+    home_team = names("homeTeam.name")
+    away_team = names("awayTeam.name")
+    winner_flag = column("score.winner")
+    knockout = stage != first_stage
+    winner = np.select(
+        [knockout & (winner_flag == "HOME_TEAM"), knockout & (winner_flag == "AWAY_TEAM")],
+        [home_team, away_team],
+        default=""
+    )
+
+    df = pd.DataFrame({
+        "Id": integers("id"),
+        "Date": date,
+        "Stage": stage,
+        "Group": column("group"),
+        "Match Day": integers("matchday"),
+        "Status": column("status"),
+        "Home Team": home_team,
+        "Away Team": away_team,
+        "Home Score": home_score,
+        "Away Score": away_score,
+        "Home Penalties": home_penalties,
+        "Away Penalties": away_penalties,
+        "Winner": pd.Series(winner, index=raw.index, dtype=object),
+    })
+
+    dropped_ids = df.loc[bad, "Id"].dropna().tolist()
+    dropped += int(bad.sum())
+    if dropped:
+        logger.warning("Dropped %d malformed %s matches: ids %s", dropped, competition, dropped_ids)
+    df = df[~bad].reset_index(drop=True)
+    df["Date Text"] = format_date(df["Date"])
+    df["Home Score Text"] = format_score(df["Home Score"], df["Home Penalties"])
+    df["Away Score Text"] = format_score(df["Away Score"], df["Away Penalties"])
+
+    # Categories keep the order in which stages first appear in the payload, groups are sorted by name
+    for col in ("Stage", "Status"):
+        df[col] = pd.Categorical(df[col], categories=df[col].dropna().unique())
+    df["Group"] = pd.Categorical(df["Group"], categories=sorted(df["Group"].dropna().unique()))
+    # Rows are stored in the order of MatchIndex, whose partitions are then slices of the shared frame
+    df = df.sort_values(INDEX_ORDER, kind="stable", ignore_index=True).astype(MATCH_COLUMNS)
+    df.attrs["dropped"] = dropped_ids
+    return df
 
-def get_mathces_list_cl (jason_file):
-    """ This function takes the JSON response from the API and returns a list of dictionaries with the relevant match information for the Champions League. 
-    It handles both league stage matches and knockout stage matches. 
+
+def normalize_matches_wc(jason_file):
+    """ This function takes the JSON response from the API and returns a typed DataFrame with the matches of the World Cup.
+    Knockout matches that went to extra time show the regular time plus extra time score, and the penalties shootout score is kept
+    in the "Home Penalties" and "Away Penalties" columns. The "Winner" column is an empty string for group stage matches.
         args:
             jason_file (list): A list of dictionaries containing match data from the API response.
         returns:
-            list: A list of dictionaries with the following keys: "Date", "Stage", "Home Team", "Away Team", "Home Score", "Away Score", "Winner", "Match Day". 
-            The "Winner" key will contain the name of the winning team for knockout stage matches and will be an empty string for league stage matches. 
-            The "Home Score" and "Away Score" keys will contain the regular time score for league stage matches and the combined regular time and extra time score for knockout stage matches. 
-            If there is an error processing the data, the function will return an empty list."""
-    try:
-        list = []
-        for match in jason_file:
-            date = match['utcDate'][:10]
-            stage = match.get('stage')
-            match_day = match.get('matchday')
-            home_team = match['homeTeam']['name']
-            away_team = match['awayTeam']['name']
-            home_score = match['score']['fullTime']['home']
-            away_score = match['score']['fullTime']['away']
-            winner_flag = match['score'].get('winner')
-            winner = ''
-            if stage != 'LEAGUE_STAGE':
-                if winner_flag == 'HOME_TEAM':
-                    winner = home_team
-                elif winner_flag == 'AWAY_TEAM':
-                    winner = away_team
-            match_dict = {
-                "Date": date,
-                "Stage": stage,
-                "Home Team": home_team,
-                "Away Team": away_team,
-                "Home Score": home_score,
-                "Away Score": away_score,
-                "Winner": winner,
-                "Match Day": match_day
-            }
-            list.append(match_dict)
-        return list
-    except Exception:
-        return []
+            DataFrame: A DataFrame with the columns of MATCH_COLUMNS. Malformed matches are logged and dropped.
+    """
+    return _normalize_matches(jason_file, "World Cup", "GROUP_STAGE")
+
+
+def normalize_matches_cl(jason_file):
+    """ This function takes the JSON response from the API and returns a typed DataFrame with the matches of the Champions League.
+    Knockout matches that went to extra time show the regular time plus extra time score, and the penalties shootout score is kept
+    in the "Home Penalties" and "Away Penalties" columns. The "Winner" column is an empty string for league stage matches.
+        args:
+            jason_file (list): A list of dictionaries containing match data from the API response.
+        returns:
+            DataFrame: A DataFrame with the columns of MATCH_COLUMNS. Malformed matches are logged and dropped.
+    """
+    return _normalize_matches(jason_file, "Champions League", "LEAGUE_STAGE")
+
+
+def format_score(score, penalties):
+    """ This function formats a score column for display, adding the penalties shootout score in parentheses, e.g. "2 (4)".
+        args:
+            score (Series): A nullable integer Series with the goals.
+            penalties (Series): A nullable integer Series with the penalties shootout goals.
+        returns:
+            Series: A string Series, empty for matches that have not been played.
+    """
+    text = score.astype("string")
+    text = text.where(penalties.isna(), text + " (" + penalties.astype("string") + ")")
+    return text.fillna("").astype(object)
+
+
+def format_date(date):
+    """ This function formats a datetime column as YYYY-MM-DD strings for display. """
+    # Each match day is formatted once, missing dates get the code -1 and so the empty string appended last
+    codes, days = pd.factorize(date.dt.floor("D"))
+    text = np.append(days.strftime("%Y-%m-%d").to_numpy(dtype=object), "")
+    return pd.Series(text[codes], index=date.index, dtype=object)
+
+
+def get_title_cells(values):
+    """ This function formats the values of a column for display in a table, replacing underscores with spaces and title casing every text value.
+    The formatting runs once per distinct value, which matters for columns like teams and groups that repeat on many rows.
+        args:
+            values (list): The values of the column to format.
+        returns:
+            list: The formatted cell values, with None for missing values.
+    """
+    labels = {v: v.replace("_", " ").title() if isinstance(v, str) else None if pd.isna(v) else v for v in dict.fromkeys(values)}
+    return [labels[v] for v in values]
+
+
+# Table columns updated in the browser by the live score clientside callback when a delta arrives, and the delta field they show
+LIVE_FIELDS = {"Home Score": "home", "Away Score": "away"}
+
+
+def get_live_attributes(match_id, field):
+    """ This function returns the id of the component showing a field of a match, as keyword arguments for the component.
+    The apply_deltas clientside callback of assets/live.js updates the components with these ids through set_props.
+    """
+    if field is None or pd.isna(match_id):
+        return {}
+    return {"id": {"type": "live-score", "match": int(match_id), "field": field}}
+
+
+def get_results_table(columns, display_cols, caption, prefix, header_color, row_color, style=None, match_ids=None):
+    """ This function builds the results table of a stage or match day in the mode selected by TABLE_MODE.
+    In "html" mode it returns an html.Table with one html.Tr per match. In "grid" mode the rows are sent as plain data to a
+    virtualized DataTable that sorts and filters in the browser and only mounts the visible rows, wrapped with the same
+    CSS classes and caption as the HTML table.
+        args:
+            columns (list): One list of formatted cell values per displayed column.
+            display_cols (list): The column names, used as headers.
+            caption (str): The table caption.
+            prefix (str): The prefix of the CSS classes, "wc" or "cl".
+            header_color (str): Background color of the grid header.
+            row_color (str): Background color of the grid rows.
+            style (dict): Optional style of the table.
+            match_ids (list): The match id of every row. In "html" mode the score cells are tagged with it for live updates.
+        returns:
+            A Dash component with the results table.
+    """
+    if TABLE_MODE == "grid":
+        return html.Div([
+            html.Div(caption, className=f"{prefix}-table-caption"),
+            dash_table.DataTable(
+                columns=[{"name": col, "id": col} for col in display_cols],
+                data=[dict(zip(display_cols, row)) for row in zip(*columns)],
+                sort_action="native",
+                filter_action="native",
+                page_action="none",
+                virtualization=True,
+                fixed_rows={"headers": True},
+                style_table={"maxHeight": "70vh", "overflowY": "auto"},
+                style_header={"backgroundColor": header_color, "color": "whitesmoke", "fontWeight": "bolder"},
+                style_filter={"backgroundColor": row_color, "color": "whitesmoke"},
+                style_cell={"backgroundColor": row_color, "color": "whitesmoke", "textAlign": "center", "border": "none", "minWidth": "10vw"}
+            )
+        ], className=f"{prefix}-table", style=style)
+
+    fields = [LIVE_FIELDS.get(col) for col in display_cols]
+    if match_ids is None:
+        match_ids = [None] * len(columns[0]) if columns else []
+    return html.Table([
+        html.Caption(caption, className=f"{prefix}-table-caption"),
+        html.Thead(
+            html.Tr([html.Th(col) for col in display_cols], className=f"{prefix}-table-header")
+        ),
+        html.Tbody(
+            [html.Tr([html.Td(cell, **get_live_attributes(match_id, field)) for cell, field in zip(row, fields)], className=f"{prefix}-tr") for match_id, row in zip(match_ids, zip(*columns))],
+            className=f"{prefix}-table-body")], className=f"{prefix}-table", style=style
+    )
+
 
+def get_standings_table(table, prefix):
+    """ This function builds the standings table of a group.
+        args:
+            table (DataFrame): The standings of the group as returned by standings.compute_standings.
+            prefix (str): The prefix of the CSS classes, "wc" or "cl".
+        returns:
+            A Dash HTML table with one row per team.
+    """
+    headers = ["#" if col == "Position" else col for col in STANDINGS_COLUMNS]
+    columns = [table[col].tolist() for col in STANDINGS_COLUMNS]
+    return html.Table([
+        html.Thead(
+            html.Tr([html.Th(col) for col in headers], className=f"{prefix}-table-header")
+        ),
+        html.Tbody(
+            [html.Tr([html.Td(cell) for cell in row], className=f"{prefix}-tr") for row in zip(*columns)],
+            className=f"{prefix}-table-body")], className=f"standings-table {prefix}-standings"
+    )
 
-def get_wc_stage_component(df, stage_code, stage_label):
-    """ This function takes a DataFrame containing World Cup match data, a stage code, and a stage label, and returns a Dash HTML component that displays the matches for that stage. 
-    The function filters the DataFrame for the specified stage and creates a component that displays the matches in a table format. 
+
+def get_wc_stage_component(index, stage_code, stage_label, standings=None, code="WC"):
+    """ This function takes the match index of the World Cup, a stage code, and a stage label, and returns a Dash HTML component that displays the matches for that stage. 
+    The function takes the pre-sorted matches of the specified stage from the index and creates a component that displays the matches in a table format. 
     For the group stage, it also groups the teams by their respective groups and displays them in separate sections. 
     If there is an error processing the data, the function returns a simple HTML div with an error message. 
         args:
-            df (DataFrame): A DataFrame containing World Cup match data with columns "Date", "Stage", "Group", "Home Team", "Away Team", "Home Score", "Away Score", and "Winner".
+            index (MatchIndex): The MatchIndex built from the World Cup frame returned by normalize_matches_wc.
             stage_code (str): The code for the stage to filter the matches.
             stage_label (str): The label for the stage to display in the component.
+            standings (dict): The standings of the group stage as returned by standings.get_standings, computed here if None.
+            code (str): The competition code of the registry entry, unused since the World Cup stages have no callbacks of their own.
         returns:
             A Dash HTML component that displays the matches for the specified stage in a table format. For the group stage, it also groups the teams by their respective groups and displays them in separate sections. 
             If there is an error processing the data, it returns a simple HTML div with an error message.
             """
     try:
-        df = pd.DataFrame(df)
-        # Filter the DataFrame for the current stage
-        stage_df = df[df["Stage"] == stage_code]
+        # Matches of the current stage, already sorted by group and date
+        stage_df = index.stage(stage_code)
         if stage_df.empty:
             return html.Div("No data available")
 
         stage_component = []
+        # Cell values of the results table, from the display strings of the snapshot unless replaced here
+        cells = {col: stage_df[DISPLAY_COLUMNS.get(col, col)].tolist() for col in DISPLAY_COLUMNS}
         if stage_code == "GROUP_STAGE":
-            stage_list = []
-            stage_teams = []
-            stage_df = stage_df.sort_values(["Group", "Date"])
             display_cols = ["Date", "Group", "Home Team", "Home Score", "Away Score", "Away Team"]
-            #Extract unique groups and teams for the group stage
-            stage_groups = stage_df["Group"].unique().tolist()
-            for m in stage_groups:
-                stage_list.append(m)
-
-            # Filter df for groups and extract unique teams for each group, then append to stage_teams list as dictionaries with team name and group name. This will be used to display teams by group in the component.
-            for index, row in stage_df.iterrows():
-                if {"team": row["Home Team"], "group": row["Group"]} not in stage_teams:
-                    stage_teams.append({"team": row["Home Team"], "group": row["Group"]})
-                if {"team": row["Away Team"], "group": row["Group"]} not in stage_teams:
-                    stage_teams.append({"team": row["Away Team"], "group": row["Group"]})
-
-            for g in stage_list:
-                group_elements = []
-                for t in stage_teams:
-                    if t["group"] == g:
-                        group_elements.append(
-                            html.Li(t["team"], className="generic-text", id=f"{t['team']}-wc-group")
-                        )
+            if standings is None:
+                standings = compute_standings(stage_df)
+            # Teams of each group in order of first appearance, home team before away team of every match
+            for g in index.groups(stage_code):
+                group_df = index.group(stage_code, g)
+                group_teams = dict.fromkeys(np.column_stack([group_df["Home Team"].to_numpy(), group_df["Away Team"].to_numpy()]).ravel().tolist())
                 stage_component.append(
                     html.Div([
                         html.H3(g.replace("_", " ").upper(), style={"textAlign": "center"}),
-                        html.Ul(group_elements)
+                        html.Ul([html.Li(t, className="generic-text", id=f"{t}-wc-group") for t in group_teams]),
+                        get_standings_table(standings[g], "wc") if g in standings else None
                     ], className="unordered-list", id=f"{g}-wc-group")
                 )
         else:
-            stage_df = stage_df.sort_values("Date")
-            stage_df['Home Team'] = stage_df['Home Team'].fillna('TBD')
-            stage_df['Away Team'] = stage_df['Away Team'].fillna('TBD')
             display_cols = ["Date", "Home Team", "Home Score", "Away Score", "Away Team"]
-            match_elements = []
-            for index, row in stage_df.iterrows():
-                match_elements.append(
-                    html.Span(f"{row['Home Team']} vs. {row['Away Team']}", className="generic-text-2", id=f"{row['Home Team']}-vs-{row['Away Team']}-wc-match-{index}")
-                )
+            # Teams are not known before the draw of the round
+            for col in ("Home Team", "Away Team"):
+                cells[col] = ["TBD" if pd.isna(t) else t for t in stage_df[col].tolist()]
+            match_elements = [
+                html.Span(f"{home} vs. {away}", className="generic-text-2", id=f"{home}-vs-{away}-wc-match-{i}")
+                for i, home, away in zip(stage_df.index, cells["Home Team"], cells["Away Team"])
+            ]
             stage_component.append(
                 html.Div([
                     html.H3("GAMES"),
@@ -172,19 +345,13 @@ def get_wc_stage_component(df, stage_code, stage_label):
                 ], className="flex-spans", id=f"{stage_code}-wc-match")
             )
 
+        # Table cells are built column by column, formatting each distinct value once
+        columns = [get_title_cells(cells[col] if col in cells else stage_df[col].tolist()) for col in display_cols]
         return html.Div(
             id=f"{stage_code}_tab_wc",
             children=[
                 html.Div(stage_component, className="wrapper"),
-                html.Table([
-                    html.Caption(f"{stage_label} Results", className="wc-table-caption"),
-                    html.Thead(
-                        html.Tr([html.Th(col) for col in display_cols], className="wc-table-header")
-                    ),
-                    html.Tbody(
-                        [html.Tr([html.Td(row[col].replace("_", " ").title() if isinstance(row[col], str) else row[col]) for col in display_cols], className="wc-tr") for index, row in stage_df.iterrows()],
-                        className="wc-table-body")], className="wc-table"
-                )
+                get_results_table(columns, display_cols, f"{stage_label} Results", "wc", WC_PRIMARY_COLOR, WC_MAIN_BG_COLOR, match_ids=stage_df["Id"].tolist())
             ],
             style={'backgroundColor': 'black', 'color': 'whitesmoke', 'justifyContent': 'center', 'alignItems': 'center'}
         )
@@ -192,98 +359,150 @@ def get_wc_stage_component(df, stage_code, stage_label):
         return html.Div(f"Error loading World Cup data: {e}")
 
 
-def get_cl_stage_component(df, stage_code, stage_label):
-    """ This function takes a DataFrame containing Champions League match data, a stage code, and a stage label, and returns a Dash HTML component that displays the matches for that stage. 
-    The function filters the DataFrame for the specified stage and creates a component that displays the matches in a table format. 
-    For the league stage, it also groups the matches by their respective match days and displays them in separate sections. 
+def get_cl_match_day_component(index, stage_code, match_day, stage_label):
+    """ This function returns the results table of one match day of a Champions League stage.
+        args:
+            index (MatchIndex): The MatchIndex built from the Champions League frame returned by normalize_matches_cl.
+            stage_code (str): The code of the stage, e.g. LEAGUE_STAGE.
+            match_day (int): The match day to display.
+            stage_label (str): The label for the stage to display in the table caption.
+        returns:
+            A Dash component with the results table of the match day.
+    """
+    display_cols = ["Date", "Home Team", "Home Score", "Away Score", "Away Team"]
+    match_day_df = index.matchday(stage_code, match_day)
+    columns = [match_day_df[DISPLAY_COLUMNS.get(col, col)].tolist() for col in display_cols]
+    return get_results_table(columns, display_cols, f"{stage_label} Results", "cl", CL_PRIMARY_COLOR, CL_MAIN_BG_COLOR, style={'color': 'white', 'justifyContent': 'center', 'alignItems': 'center'}, match_ids=match_day_df["Id"].tolist())
+
+
+def get_cl_standings_component(standings, stage_label):
+    """ This function returns the standings table of the Champions League league phase.
+        args:
+            standings (dict): The standings of the league stage as returned by standings.get_standings.
+            stage_label (str): The label for the stage to display in the table caption.
+        returns:
+            A Dash HTML component with the standings, or a message if no team has a fixture yet.
+    """
+    if None not in standings:
+        return html.H2("No standings available for this stage")
+    return html.Div([
+        html.Div(f"{stage_label} Table", className="cl-table-caption"),
+        get_standings_table(standings[None], "cl")
+    ], className="cl-table", style={'color': 'white', 'justifyContent': 'center', 'alignItems': 'center'})
+
+
+def get_cl_stage_component(index, stage_code, stage_label, standings=None, code="CL"):
+    """ This function takes the match index of the Champions League, a stage code, and a stage label, and returns a Dash HTML component that displays the matches for that stage. 
+    The function takes the pre-sorted matches of the specified stage from the index and creates a component that displays the matches in a table format. 
+    For the league stage, it also groups the matches by their respective match days in tabs, rendering only the first one, the others are
+    built by get_cl_match_day_component when their tab is selected, and adds a tab with the standings built by get_cl_standings_component. 
     If there is an error processing the data, the function returns a simple HTML div with an error message. 
         args:
-            df (DataFrame): A DataFrame containing Champions League match data with columns "Date", "Stage", "Home Team", "Away Team", "Home Score", "Away Score", "Winner", and "Match Day".
+            index (MatchIndex): The MatchIndex built from the Champions League frame returned by normalize_matches_cl.
             stage_code (str): The code for the stage to filter the matches.
             stage_label (str): The label for the stage to display in the component.
+            standings (dict): Unused, the league standings are rendered when their tab is selected.
+            code (str): The competition code of the registry entry, used in the ids of the match day tabs so their callback
+            renders the matches of this competition.
         returns:
             A Dash HTML component that displays the matches for the specified stage in a table format. For the league stage, it also groups the matches by their respective match days and displays them in separate sections. 
             If there is an error processing the data, it returns a simple HTML div with an error message.
     """
     try:
-        df = pd.DataFrame(df)
-        # Filter the DataFrame for the current stage
-        stage_df = df[df["Stage"] == stage_code]
+        # Matches of the current stage, already sorted by date
+        stage_df = index.stage(stage_code)
         if stage_df.empty:
             return html.Div("No data available")
 
-        stage_df = stage_df.sort_values(["Stage", "Date"])
-        display_cols = ["Date", "Home Team", "Home Score", "Away Score", "Away Team"]
-
         if stage_code == "LEAGUE_STAGE":
-            match_day_list = stage_df["Match Day"].unique().tolist()
-            match_day_tables = []
-            for m in match_day_list:
-                new_df = stage_df[stage_df["Match Day"] == m]
-                match_day_tables.append(
-                    html.Table([
-                        html.Caption(f"{stage_label} Results", className="cl-table-caption"),
-                        html.Thead(
-                            html.Tr([html.Th(col) for col in display_cols], className="cl-table-header")
-                        ),
-                        html.Tbody(
-                            [html.Tr([html.Td(row[col]) for col in display_cols], className="cl-tr") for index, row in new_df.iterrows()],
-                            className="cl-table-body")], className="cl-table", style={'color': 'white', 'justifyContent': 'center', 'alignItems': 'center'}
-                    ))
-            select_match_day = dcc.Tabs(children=[dcc.Tab(id=f"match-day-{m}",
+            # Only the selected match day is rendered, the others are loaded by their tab when it is selected
+            match_day_list = index.matchdays(stage_code)
+            selected = match_day_list[0]
+            select_match_day = dcc.Tabs(
+                id={"type": "match-day-tabs", "competition": code, "stage": stage_code},
+                value=f'{selected}',
+                children=[dcc.Tab(id=f"match-day-{m}",
                                 label=f"Match Day {m:.0f}",
-                                children=match_day_tables[i],
                                 value=f'{m}',
-                                style={'backgroundColor': f'{CL_MAIN_BG_COLOR}', 'color': 'white', 'justifyContent': 'center', 'alignItems': 'center'}) for i, m in enumerate(match_day_list)
+                                style={'backgroundColor': f'{CL_MAIN_BG_COLOR}', 'color': 'white', 'justifyContent': 'center', 'alignItems': 'center'}) for m in match_day_list
+                                ] + [dcc.Tab(id="match-day-standings",
+                                label="Table",
+                                value="standings",
+                                style={'backgroundColor': f'{CL_MAIN_BG_COLOR}', 'color': 'white', 'justifyContent': 'center', 'alignItems': 'center'})
                                 ])
             return html.Div(
                 id=f"{stage_code}_tab_cl",
-                children=select_match_day,
+                children=[
+                    select_match_day,
+                    html.Div(
+                        get_cl_match_day_component(index, stage_code, selected, stage_label),
+                        id={"type": "match-day-content", "competition": code, "stage": stage_code}
+                    )
+                ],
                 style={'backgroundColor': f'{CL_MAIN_BG_COLOR}', 'color': 'white', 'justifyContent': 'center', 'alignItems': 'center'}
             )
         
-        stage_teams = stage_df.drop_duplicates(subset="Home Team", keep="first").to_dict("records")
-        stage_teams_list = [[m['Home Team'], m['Away Team']] for m in stage_teams]
-        matchups_dict = {}
-        for m in stage_teams_list:
-            if m[0] == None or m[1] == None:
-                continue
-            sorted_key = sorted(m)
-            if f"{sorted_key[0]} vs {sorted_key[1]}" in matchups_dict:
-                matchups_dict[f"{sorted_key[0]} vs {sorted_key[1]}"].append(m)
-            else:
-                matchups_dict.update({f"{sorted_key[0]} vs {sorted_key[1]}": [m]})
-        #print(matchups_dict)
+        # Every match with both teams known belongs to the tie of its unordered pair of teams
+        ties_df = stage_df[stage_df["Home Team"].notna() & stage_df["Away Team"].notna()]
+        home = ties_df["Home Team"].to_numpy(dtype=object)
+        away = ties_df["Away Team"].to_numpy(dtype=object)
+        swapped = home > away
+        first_team = np.where(swapped, away, home)
+        second_team = np.where(swapped, home, away)
+        codes, tie_keys = pd.factorize(first_team + " vs " + second_team)
+
+        # Aggregate score and shootout of each tie from the point of view of its first team, and the number of legs played
+        def per_tie(home_col, away_col):
+            home_values = ties_df[home_col].to_numpy(dtype="float64", na_value=np.nan)
+            away_values = ties_df[away_col].to_numpy(dtype="float64", na_value=np.nan)
+            first, second = np.where(swapped, away_values, home_values), np.where(swapped, home_values, away_values)
+            played = ~np.isnan(first) & ~np.isnan(second)
+            totals = [np.bincount(codes, weights=np.where(played, values, 0), minlength=len(tie_keys)).astype(int) for values in (first, second)]
+            return totals, np.bincount(codes, weights=played, minlength=len(tie_keys)).astype(int)
+
+        (first_goals, second_goals), played_legs = per_tie("Home Score", "Away Score")
+        (first_penalties, second_penalties), shootouts = per_tie("Home Penalties", "Away Penalties")
+
+        # Rows of each tie in date order, the stage frame is already sorted by date
+        order = np.argsort(codes, kind="stable")
+        legs_by_tie = np.split(order, np.cumsum(np.bincount(codes, minlength=len(tie_keys)))[:-1])
+
+        match_ids = ties_df["Id"].tolist()
+        home_teams = home.tolist()
+        away_teams = away.tolist()
+        home_scores = ties_df["Home Score"].tolist()
+        away_scores = ties_df["Away Score"].tolist()
         stage_component = []
-        for key, value in matchups_dict.items():
-            #print(f"{key} : {value}")
+        for tie_code, (key, legs) in enumerate(zip(tie_keys, legs_by_tie)):
             div_elements = []
-            for v in value:
-                # Filter the DataFrame for the specific matchup
-                matchup_df = stage_df[(stage_df["Home Team"] == v[0]) & (stage_df["Away Team"] == v[1])]
-                if matchup_df.empty:
-                    continue
-                for index, row in matchup_df.iterrows():
-                    if math.isnan(row["Home Score"])  and math.isnan(row["Away Score"]):
-                        div_elements.append(
-                            html.Div(
-                            f"{row['Home Team']} vs. {row['Away Team']}",
-                            className="generic-text-3",
-                            id=f"{row['Home Team']}-vs-{row['Away Team']}-cl-match",
-                            )
+            for leg in legs:
+                home_team, away_team = home_teams[leg], away_teams[leg]
+                if pd.isna(home_scores[leg]) or pd.isna(away_scores[leg]):
+                    div_elements.append(
+                        html.Div(
+                        f"{home_team} vs. {away_team}",
+                        className="generic-text-3",
+                        **(get_live_attributes(match_ids[leg], "result") or {"id": f"{home_team}-vs-{away_team}-cl-match"})
                         )
-                    else:
-                        div_elements.append(
-                            html.Div(
-                            f"{row['Home Team']} {int(row['Home Score'])} - {int(row['Away Score'])} {row['Away Team']}",
-                            className="generic-text-4",
-                            id=f"{row['Home Team']}-vs-{row['Away Team']}-cl-match"
-                            )
+                    )
+                else:
+                    div_elements.append(
+                        html.Div(
+                        f"{home_team} {home_scores[leg]} - {away_scores[leg]} {away_team}",
+                        className="generic-text-4",
+                        **(get_live_attributes(match_ids[leg], "result") or {"id": f"{home_team}-vs-{away_team}-cl-match"})
                         )
+                    )
+            header = [html.H2(key, className="matchup-header")]
+            # The aggregate is only shown once every leg has been played, a partial sum would read as a result
+            if len(legs) > 1 and played_legs[tie_code] == len(legs):
+                aggregate = f"Aggregate {first_goals[tie_code]} - {second_goals[tie_code]}"
+                if shootouts[tie_code]:
+                    aggregate += f", {first_penalties[tie_code]} - {second_penalties[tie_code]} on penalties"
+                header.append(html.P(aggregate, className="matchup-aggregate"))
             stage_component.append(
                 html.Div(
-                children=[
-                    html.H2(key, className="matchup-header"),
+                children=header + [
                     html.Div(div_elements, className="matchup-results")
                 ],
                 className="matchup-container",
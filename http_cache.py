@@ -0,0 +1,72 @@
+import hashlib
+import os
+from functools import lru_cache
+
+from flask import Response, request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Assets requested with a fingerprint in their URL never change, browsers may keep them for a year without revalidating
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@lru_cache(maxsize=None)
+def get_file_hash(path):
+    """ This function returns the first 12 hexadecimal digits of the SHA-256 of a file, or None if it can not be read.
+    Files are hashed once per process, assets and sources do not change while the app runs.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()[:12]
+
+
+def get_asset_url(url):
+    """ This function adds the content hash of an asset to its URL, e.g. /assets/styles.css -> /assets/styles.css?v=3f2a9c0d1b7e.
+    The URL changes whenever the file does, so it can be cached as immutable.
+        args:
+            url (str): The URL of a file of the assets folder, starting with /assets/.
+        returns:
+            str: The URL with a v query parameter, or unchanged if the file does not exist.
+    """
+    file_hash = get_file_hash(os.path.join(ROOT, url.lstrip("/")))
+    return f"{url}?v={file_hash}" if file_hash else url
+
+
+def _matches_etag(header, etag):
+    # Flask-Compress appends the encoding to the ETag of compressed responses (W/"tag:gzip"), the tag before it is compared
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag.removeprefix("W/").strip('"').split(":")[0] == etag:
+            return True
+    return False
+
+
+def register_http_caching(server):
+    """ This function adds the cache headers of the Dash and asset responses to the Flask server.
+    Fingerprinted assets (?v= from get_asset_url or Dash's own ?m=) are immutable. The layout and the callback dependencies
+    get an ETag from their content and are revalidated with If-None-Match. Callback responses are POSTs, which browsers
+    never revalidate, so they get no ETag.
+        args:
+            server (Flask): The Flask server of the Dash app.
+    """
+
+    @server.after_request
+    def add_cache_headers(response):
+        path = request.path
+        if path.startswith("/assets/"):
+            if response.status_code in (200, 304) and ("v" in request.args or "m" in request.args):
+                response.headers["Cache-Control"] = ASSET_CACHE_CONTROL
+        elif request.method == "GET" and path.endswith(("/_dash-layout", "/_dash-dependencies")):
+            if response.status_code == 200 and not response.direct_passthrough:
+                # This hook runs before Flask-Compress, which then suffixes the ETag of the compressed body with the encoding
+                response.add_etag()
+                etag = response.get_etag()[0]
+                if _matches_etag(request.headers.get("If-None-Match"), etag):
+                    response = Response(status=304)
+                    response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+        return response
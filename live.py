@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from flask import Response, jsonify, request, stream_with_context
+
+
+# A stream is closed after STREAM_DURATION seconds and the browser reconnects, resuming from its last event id
+STREAM_DURATION = float(os.environ.get('STREAM_DURATION', 300))
+# Seconds between keep-alive comments on an idle stream, and longest wait of a long-poll request
+HEARTBEAT_INTERVAL = float(os.environ.get('HEARTBEAT_INTERVAL', 15))
+# Number of events kept to resume streams and answer long-poll requests
+EVENT_HISTORY = int(os.environ.get('EVENT_HISTORY', 256))
+
+
+def get_score_deltas(code, rows, version):
+    """ This function turns changed matches into compact score deltas for the browsers.
+        args:
+            code (str): The competition code.
+            rows (DataFrame): The normalized rows of the changed matches.
+            version (int): The stored version of the snapshot the rows come from, the same in every worker.
+        returns:
+            list: One dictionary per match with its id, version, scores as displayed in the tables, result line and status.
+    """
+    home_scores = rows["Home Score Text"].tolist()
+    away_scores = rows["Away Score Text"].tolist()
+    deltas = []
+    statuses = rows["Status"].astype(object).where(rows["Status"].notna(), None).tolist()
+    for match_id, home_team, away_team, home, away, status in zip(
+            rows["Id"].tolist(), rows["Home Team"].fillna("TBD").tolist(), rows["Away Team"].fillna("TBD").tolist(), home_scores, away_scores, statuses):
+        deltas.append({
+            "competition": code,
+            "id": match_id,
+            "version": version,
+            "home": home,
+            "away": away,
+            "result": f"{home_team} {home} - {away} {away_team}" if home and away else f"{home_team} vs. {away_team}",
+            "status": status,
+        })
+    return deltas
+
+
+class ScorePublisher:
+    """ In-process publisher fanning out score deltas to every connected browser.
+    Every event carries its competition and the stored version of the snapshot it comes from, which is the same in every
+    worker, so a browser reconnecting to another worker resumes after the versions it has seen and never gets older scores
+    again. The last EVENT_HISTORY events are kept, and every stream and long-poll request only waits on one condition and
+    reads the events after its versions, without a queue per client.
+    """
+
+    def __init__(self, history=EVENT_HISTORY):
+        self._events = deque(maxlen=history)
+        self._versions = {}
+        self._condition = threading.Condition()
+
+    def versions(self):
+        """ This function returns the version of the last event of every competition. """
+        with self._condition:
+            return dict(self._versions)
+
+    def publish(self, code, version, deltas):
+        """ This function publishes a list of score deltas of a competition as one event and wakes up every waiting client. """
+        if not deltas:
+            return
+        with self._condition:
+            self._events.append((code, version, json.dumps(deltas)))
+            self._versions[code] = max(self._versions.get(code, 0), version)
+            self._condition.notify_all()
+
+    def wait(self, since, timeout):
+        """ This function returns the events newer than the versions a client has seen, waiting up to timeout seconds for one.
+            args:
+                since (dict): The last version the client has seen per competition, 0 for a competition it has not seen.
+                timeout (float): Maximum number of seconds to wait.
+            returns:
+                list: (code, version, data) tuples, data being the JSON encoded deltas.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: any(v > since.get(c, 0) for c, v in self._versions.items()), timeout)
+            return [event for event in self._events if event[1] > since.get(event[0], 0)]
+
+    def on_snapshot(self, code, previous, snapshot):
+        """ This function is a snapshot listener publishing the scores of the matches changed by a refresh. """
+        if snapshot.changes is not None:
+            self.publish(code, snapshot.stored_version, get_score_deltas(code, snapshot.changes.rows, snapshot.stored_version))
+
+
+def format_since(since):
+    """ This function encodes the versions seen by a client as the id of a stream event, e.g. "CL:7,WC:3". """
+    return ",".join(f"{code}:{version}" for code, version in sorted(since.items()))
+
+
+def _get_since(publisher, value):
+    # Competitions the client has not seen start from the current version, nothing older is sent to a new client
+    since = publisher.versions()
+    for part in (value or "").split(","):
+        code, _, version = part.partition(":")
+        try:
+            since[code] = int(version)
+        except ValueError:
+            continue
+    return since
+
+
+def register_live_routes(server, publisher, get_status):
+    """ This function adds the live score routes to the Flask server.
+    /live/status tells browsers whether a match is in progress, and they only open a connection while one is.
+    /live/stream is a Server-Sent Events stream and /live/poll?since=<versions> a long-poll fallback returning the same events
+    as JSON. Both resume after the versions of format_since, taken from the Last-Event-ID header or the since parameter.
+    Both end with the "idle" state once nothing is live, and the browser checks /live/status again after its retry delay.
+    Open streams hold their connection for up to STREAM_DURATION seconds, so the app must run on an asynchronous worker
+    (gevent in the Procfile) where they do not take a thread from the pool serving the callbacks.
+        args:
+            server (Flask): The Flask server of the Dash app.
+            publisher (ScorePublisher): The publisher of the score deltas.
+            get_status (function): Returns {"live": bool, "retry": seconds}, e.g. MatchDataRefresher.live_status.
+    """
+
+    @server.route("/live/status")
+    def live_status():
+        response = jsonify(get_status())
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    @server.route("/live/stream")
+    def live_stream():
+        since = _get_since(publisher, request.headers.get("Last-Event-ID") or request.args.get("since"))
+
+        def events(since):
+            yield "retry: 2000\n\n"
+            deadline = time.monotonic() + STREAM_DURATION
+            while time.monotonic() < deadline:
+                status = get_status()
+                if not status["live"]:
+                    # Events published by the last refresh of a match were sent by the previous iteration
+                    yield f"event: idle\ndata: {json.dumps(status)}\n\n"
+                    return
+                pending = publisher.wait(since, HEARTBEAT_INTERVAL)
+                if not pending:
+                    yield ": keep-alive\n\n"
+                for code, version, data in pending:
+                    since[code] = max(since.get(code, 0), version)
+                    yield f"id: {format_since(since)}\ndata: {data}\n\n"
+
+        return Response(
+            stream_with_context(events(since)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @server.route("/live/poll")
+    def live_poll():
+        since = _get_since(publisher, request.args.get("since"))
+        status = get_status()
+        # Without a live match the request returns at once with what was missed, instead of holding a connection
+        pending = publisher.wait(since, HEARTBEAT_INTERVAL if status["live"] else 0)
+        for code, version, _ in pending:
+            since[code] = max(since.get(code, 0), version)
+        return jsonify({
+            "since": format_since(since),
+            "events": [json.loads(data) for _, _, data in pending],
+            **status,
+        })
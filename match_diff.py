@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# What changed between two snapshots of a competition
+ChangeSet = namedtuple("ChangeSet", [
+    "ids",             # Ids of the matches added, removed or modified
+    "rows",            # New rows of the added or modified matches
+    "stages",          # Stages containing a changed match, before or after the change
+    "groups",          # (stage, group) pairs containing a changed match
+    "matchdays",       # (stage, match day) pairs containing a changed match
+    "stages_changed",  # True if a stage appeared or disappeared
+])
+
+
+def diff_matches(old_df, new_df):
+    """ This function compares two normalized match frames of a competition by match id.
+        args:
+            old_df (DataFrame): The frame of the previous snapshot.
+            new_df (DataFrame): The frame of the new snapshot.
+        returns:
+            ChangeSet: The changed matches and the stages, groups and match days they belong to, or None if the frames can not
+            be compared by id (missing or duplicated ids), in which case everything must be considered changed.
+    """
+    for df in (old_df, new_df):
+        if df["Id"].isna().any() or df["Id"].duplicated().any():
+            return None
+
+    old = old_df.set_index("Id")
+    new = new_df.set_index("Id")
+    ids = old.index.union(new.index)
+    old = old.reindex(ids)
+    new = new.reindex(ids)
+
+    # Arrow columns are compared as they are, categoricals with different categories are compared as objects
+    changed = np.zeros(len(ids), dtype=bool)
+    for col in new.columns:
+        before, after = old[col], new[col]
+        if before.dtype != after.dtype or isinstance(after.dtype, pd.CategoricalDtype):
+            before, after = before.astype(object), after.astype(object)
+        equal = (before == after).to_numpy(dtype=bool, na_value=False)
+        changed |= ~(equal | (before.isna().to_numpy() & after.isna().to_numpy()))
+
+    affected = pd.concat([old[changed], new[changed]])
+    stages = set(affected["Stage"].dropna())
+    groups = set(affected[["Stage", "Group"]].dropna().itertuples(index=False, name=None))
+    matchdays = set(affected[["Stage", "Match Day"]].dropna().itertuples(index=False, name=None))
+    changed_ids = ids[changed]
+    return ChangeSet(
+        ids=set(changed_ids),
+        rows=new_df[new_df["Id"].isin(changed_ids)],
+        stages=stages,
+        groups=groups,
+        matchdays=matchdays,
+        stages_changed=set(old_df["Stage"].dropna()) != set(new_df["Stage"].dropna()),
+    )
+
+
+def get_part_versions(index, version, previous, changes):
+    """ This function assigns a version to every stage and match day of a new snapshot.
+    Parts touched by the changes get the new snapshot version, the others keep the version of the previous snapshot,
+    so components cached under those versions stay valid.
+        args:
+            index (MatchIndex): The index of the new snapshot.
+            version (int): The version of the new snapshot.
+            previous (Snapshot): The previous snapshot of the competition.
+            changes (ChangeSet): The changes between both snapshots, None if everything changed.
+        returns:
+            tuple: (stage_versions, matchday_versions) dictionaries keyed by stage and by (stage, match day).
+    """
+    stage_versions = {}
+    matchday_versions = {}
+    for stage in index.stages:
+        if changes is None or stage in changes.stages:
+            stage_versions[stage] = version
+        else:
+            stage_versions[stage] = previous.stage_versions.get(stage, version)
+        for match_day in index.matchdays(stage):
+            key = (stage, match_day)
+            if changes is None or key in changes.matchdays:
+                matchday_versions[key] = version
+            else:
+                matchday_versions[key] = previous.matchday_versions.get(key, version)
+    return stage_versions, matchday_versions
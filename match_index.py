@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# Order of the rows of a normalized match frame, in which every stage, every group of a stage and every match day of a stage
+# without groups, like a league phase, is a contiguous block
+INDEX_ORDER = ["Stage", "Group", "Match Day", "Date"]
+
+
+def _runs(codes):
+    """ This function returns the (start, stop) offsets of the runs of equal values of an array. """
+    if not len(codes):
+        return []
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    return zip(np.concatenate([[0], bounds]).tolist(), np.concatenate([bounds, [len(codes)]]).tolist())
+
+
+def _positions(values):
+    """ This function returns the row positions of every distinct value of a column in ascending order of the values, missing
+    values left out. Values are factorized on their Arrow array, only the distinct values become Python objects.
+    """
+    codes, uniques = pd.factorize(values, sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques.tolist())}
+
+
+def _sort_keys(df):
+    """ This function returns the stage and group codes of a frame, with missing groups last as they are sorted by pandas. """
+    groups = df["Group"].cat.codes.to_numpy(dtype="int64")
+    return df["Stage"].cat.codes.to_numpy(dtype="int64"), np.where(groups < 0, len(df["Group"].cat.categories), groups)
+
+
+def is_index_ordered(df):
+    """ This function tells whether a normalized match frame is sorted by INDEX_ORDER. """
+    if len(df) < 2:
+        return True
+    stages, groups = _sort_keys(df)
+    match_days = df["Match Day"].to_numpy(dtype="float64", na_value=np.nan)
+    match_days[np.isnan(match_days)] = np.inf
+    dates = df["Date"].to_numpy(dtype="datetime64[ns]")
+    # Every key must be ascending between rows equal on the keys before it
+    tied = np.ones(len(df) - 1, dtype=bool)
+    for key in (stages, groups, match_days, dates):
+        if (tied & (key[1:] < key[:-1])).any():
+            return False
+        tied &= key[1:] == key[:-1]
+    return True
+
+
+class MatchIndex:
+    """ Partition of a normalized match frame by stage, group, match day and team, built once per data snapshot.
+    The normalizers return the frame sorted by INDEX_ORDER, so every stage and every group of a stage is a contiguous block of
+    rows and its partition is an offset slice of the frame: a view on the same Arrow buffers, which for a snapshot read from disk
+    are the memory-mapped file shared by every worker. So are the match days of a stage without groups. The match days of a
+    stage with groups and the matches of a team are spread over the frame, only their row positions are kept and their rows
+    are taken when asked for.
+    The partitions are shared by every reader and must not be modified in place.
+    """
+
+    def __init__(self, df):
+        if not is_index_ordered(df):
+            # Only frames that do not come from a normalizer get here, they are sorted once
+            df = df.sort_values(INDEX_ORDER, kind="stable", ignore_index=True)
+        self.df = df
+        self.empty = df.iloc[0:0]
+        self._stages = {}
+        self._groups = {}
+        self._matchdays = {}
+        stages, groups = _sort_keys(df)
+        for start, stop in _runs(stages):
+            stage = df["Stage"].cat.categories[stages[start]]
+            stage_df = df.iloc[start:stop]
+            self._stages[stage] = stage_df
+            self._groups[stage] = {
+                df["Group"].cat.categories[groups[start + first]]: stage_df.iloc[first:last]
+                for first, last in _runs(groups[start:stop]) if groups[start + first] < len(df["Group"].cat.categories)
+            }
+            self._matchdays[stage] = {
+                day: stage_df.iloc[rows[0]:rows[-1] + 1] if rows[-1] - rows[0] + 1 == len(rows) else start + rows
+                for day, rows in _positions(stage_df["Match Day"]).items()
+            }
+
+        # Row positions of every team, home and away, in the sorted frame
+        teams = pd.concat([df["Home Team"], df["Away Team"]], ignore_index=True)
+        self._teams = {team: np.sort(rows % len(df)) for team, rows in _positions(teams).items()}
+
+    @property
+    def stages(self):
+        """ The stage codes in the order they first appear in the data. """
+        return list(self._stages)
+
+    def stage(self, stage):
+        """ This function returns the matches of a stage sorted by group, match day and date, or an empty frame if the stage does not exist. """
+        return self._stages.get(stage, self.empty)
+
+    def groups(self, stage):
+        """ This function returns the groups of a stage sorted by name. """
+        return list(self._groups.get(stage, {}))
+
+    def group(self, stage, group):
+        """ This function returns the matches of one group of a stage sorted by match day and date. """
+        return self._groups.get(stage, {}).get(group, self.empty)
+
+    def matchdays(self, stage):
+        """ This function returns the match days of a stage in ascending order. """
+        return list(self._matchdays.get(stage, {}))
+
+    def matchday(self, stage, matchday):
+        """ This function returns the matches of one match day of a stage sorted by date. """
+        rows = self._matchdays.get(stage, {}).get(matchday)
+        if rows is None:
+            return self.empty
+        # Contiguous match days are kept as slices of the frame, the others as row positions
+        return rows if isinstance(rows, pd.DataFrame) else self.df.iloc[rows]
+
+    def team(self, team):
+        """ This function returns every match played by a team, home or away, sorted by stage and date. """
+        rows = self._teams.get(team)
+        if rows is None:
+            return self.empty
+        return self.df.iloc[rows]
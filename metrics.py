@@ -0,0 +1,163 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+logger = logging.getLogger(__name__)
+
+# Set PROFILE_REQUESTS=1 to profile every request with cProfile and log its slowest functions
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '0') == '1'
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1e3, 5e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """ Monotonic counter with labels, exported in the Prometheus text format. """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        """ This function adds amount to the counter of the given labels. """
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """ Histogram with labels and fixed buckets, exported in the Prometheus text format. """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        """ This function records one observation for the given labels. """
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """ This function is a context manager observing the seconds spent in its block. """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+                    cumulative += count
+                    le = 'le="' + str(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+CALLBACK_SECONDS = Histogram("football_callback_seconds", "Time spent in Dash callbacks.", ("callback", "competition", "stage"))
+RENDER_SECONDS = Histogram("football_render_seconds", "Time spent building stage components on a cache miss.", ("competition", "stage"))
+NORMALIZE_SECONDS = Histogram("football_normalize_seconds", "Time spent normalizing an API payload.", ("competition",))
+API_SECONDS = Histogram("football_api_request_seconds", "Duration of football-data.org requests.", ("status",))
+RESPONSE_BYTES = Histogram("football_response_bytes", "Size of the responses of the Dash endpoints.",
+                           ("endpoint", "callback", "competition", "stage"), buckets=SIZE_BUCKETS)
+CACHE_REQUESTS = Counter("football_cache_requests_total", "Lookups in the component cache.", ("cache", "result"))
+SNAPSHOTS = Counter("football_snapshots_total", "Snapshots installed per competition.", ("competition",))
+
+
+def set_response_labels(**labels):
+    """ This function labels the size of the current response with the callback, competition and stage that produced it.
+    Every callback is answered on /_dash-update-component, the labels tell the payloads of the stages apart.
+    """
+    g.response_labels = labels
+
+
+def render_metrics():
+    """ This function returns every metric of the process in the Prometheus text format. """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def register_metrics(server):
+    """ This function adds the /metrics route to the Flask server, records the size of the Dash responses, labelled with the
+    callback, competition and stage given to set_response_labels, and, if PROFILE_REQUESTS is set, profiles every request.
+    Metrics are kept per process.
+        args:
+            server (Flask): The Flask server of the Dash app.
+    """
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    @server.after_request
+    def record_response_size(response):
+        labels = g.pop("response_labels", {})
+        if request.path.startswith("/_dash-") and not response.is_streamed:
+            RESPONSE_BYTES.observe(response.calculate_content_length() or 0, endpoint=request.path, **labels)
+        return response
+
+    if not PROFILE_REQUESTS:
+        return
+
+    @server.before_request
+    def start_profile():
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @server.after_request
+    def stop_profile(response):
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(20)
+            logger.info("Profile of %s %s\n%s", request.method, request.path, out.getvalue())
+        return response
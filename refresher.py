@@ -0,0 +1,328 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+import requests
+
+from functions import empty_matches_frame
+from match_index import MatchIndex
+from match_diff import diff_matches, get_part_versions
+from snapshot_store import SnapshotStore
+from metrics import NORMALIZE_SECONDS, SNAPSHOTS
+
+logger = logging.getLogger(__name__)
+
+# Polling intervals in seconds, slower by default and faster while a match is being played
+REFRESH_INTERVAL = float(os.environ.get('REFRESH_INTERVAL', 300))
+LIVE_REFRESH_INTERVAL = float(os.environ.get('LIVE_REFRESH_INTERVAL', 30))
+
+# Longest time the startup fetch may block, competitions still loading afterwards are installed in the background
+STARTUP_TIMEOUT = float(os.environ.get('STARTUP_TIMEOUT', 20))
+
+# Match statuses reported by the API while a game is in progress
+LIVE_STATUSES = {"IN_PLAY", "PAUSED", "LIVE", "SUSPENDED"}
+# Match statuses of a game that has not started yet
+SCHEDULED_STATUSES = {"SCHEDULED", "TIMED"}
+
+# A snapshot is never mutated, a refresh builds a new one and swaps the reference
+# stage_versions and matchday_versions only move forward for the parts touched by a refresh, so they can key cached components
+# version counts the snapshots of this process, stored_version is the version of the data in the SnapshotStore, the same in
+# every worker
+Snapshot = namedtuple("Snapshot", [
+    "version", "stored_version", "df", "index", "etag", "last_modified", "live", "next_kickoff",
+    "stages", "stage_versions", "matchday_versions", "changes", "standings"
+])
+
+
+def empty_snapshot():
+    """ This function returns the snapshot used before any data has been fetched for a competition.
+        returns:
+            Snapshot: A snapshot with version 0, an empty match frame and index, and no validators.
+    """
+    df = empty_matches_frame()
+    return Snapshot(
+        version=0, stored_version=0, df=df, index=MatchIndex(df), etag=None, last_modified=None, live=False, next_kickoff=None,
+        stages=[], stage_versions={}, matchday_versions={}, changes=None, standings={}
+    )
+
+
+def get_live_state(df):
+    """ This function inspects the normalized matches of a competition and tells whether any of them is being played and when the next one starts.
+    It reads the parsed "Status" and "Date" columns, so every timestamp shape accepted by the normalizer counts.
+        args:
+            df (DataFrame): The normalized match frame of the competition.
+        returns:
+            tuple: (live, next_kickoff) where live is True if a match is in progress and next_kickoff is the epoch time of the
+            closest scheduled kickoff in the future, or None if there is none.
+    """
+    status = df["Status"].astype(object)
+    live = bool(status.isin(LIVE_STATUSES).any())
+    kickoffs = df["Date"][status.isin(SCHEDULED_STATUSES) & (df["Date"] > pd.Timestamp.now(tz="UTC"))]
+    next_kickoff = kickoffs.min().timestamp() if len(kickoffs) else None
+    return live, next_kickoff
+
+
+def get_poll_interval(snapshot):
+    """ This function returns how often the API should be asked for a competition: the live interval while a match is in
+    progress, the regular interval otherwise, shortened so the first poll after the next kickoff is not late.
+    """
+    if snapshot.live:
+        return LIVE_REFRESH_INTERVAL
+    if snapshot.next_kickoff is not None:
+        return min(REFRESH_INTERVAL, max(LIVE_REFRESH_INTERVAL, snapshot.next_kickoff - time.time()))
+    return REFRESH_INTERVAL
+
+
+def get_version(snapshot, stage, match_day=None):
+    """ This function returns the version of a stage, or of one match day of a stage, in a snapshot.
+    It only changes when a match of that part changes, which makes it the right key for components built from it.
+    """
+    if match_day is not None:
+        return snapshot.matchday_versions.get((stage, match_day), snapshot.version)
+    return snapshot.stage_versions.get(stage, snapshot.version)
+
+
+class MatchDataRefresher:
+    """ Keeps an up to date snapshot of the matches of every tracked competition.
+    Each competition is polled with conditional requests (If-None-Match / If-Modified-Since), a 304 response keeps the current
+    snapshot without parsing anything, and a new payload is normalized into a DataFrame that replaces the previous snapshot
+    in a single reference swap, so readers never see a half updated competition.
+    The process writing the shared SnapshotStore polls the API, the other worker processes load the frames it writes and only
+    fetch a competition the store does not have or the writer does not keep fresh.
+    """
+
+    def __init__(self, client, store=None):
+        self.client = client
+        self.store = store or SnapshotStore()
+        self._sources = {}
+        self._snapshots = {}
+        self._disk_versions = {}
+        self._ready = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def track(self, code, url, normalizer):
+        """ This function registers a competition to be polled.
+            args:
+                code (str): The competition code used to look up its snapshot, e.g. "WC".
+                url (str): The API URL returning the matches of the competition.
+                normalizer (function): A function turning the list of raw matches into a normalized match DataFrame.
+        """
+        self._sources[code] = (url, normalizer)
+        self._snapshots.setdefault(code, empty_snapshot())
+
+    def snapshot(self, code):
+        """ This function returns the current snapshot of a competition. """
+        return self._snapshots.get(code) or empty_snapshot()
+
+    def ensure(self, code, url, normalizer, timeout=STARTUP_TIMEOUT):
+        """ This function returns the snapshot of a competition, starting to track it on first access.
+        The first call loads the shared snapshot or fetches the competition, waiting at most timeout seconds, and the competition
+        is polled in the background from then on. Concurrent first calls wait for the same load instead of fetching again.
+            args:
+                code (str): The competition code, e.g. "WC".
+                url (str): The API URL returning the matches of the competition.
+                normalizer (function): A function turning the list of raw matches into a normalized match DataFrame.
+                timeout (float): Maximum number of seconds to wait for the first load.
+            returns:
+                Snapshot: The current snapshot, empty if the first load failed or did not finish in time.
+        """
+        with self._lock:
+            ready = self._ready.get(code)
+            first = ready is None
+            if first:
+                ready = self._ready[code] = threading.Event()
+                self.track(code, url, normalizer)
+        if first:
+            try:
+                self._load(code)
+                if self.snapshot(code).version == 0:
+                    self.refresh_all(timeout=timeout, codes=[code])
+            finally:
+                ready.set()
+        else:
+            ready.wait(timeout)
+        return self.snapshot(code)
+
+    def refresh(self, code):
+        """ This function updates the snapshot of a competition once.
+        The writer process polls the API and saves new data to the shared store. Other processes load the shared snapshot
+        when it is newer than theirs, and only call the API themselves when the store has nothing for the competition or the
+        writer has not checked it for two polling intervals, e.g. because it never tracked it. Fetches hold the fetch lock of
+        the competition, so processes that find the store empty at the same time make a single request and the others load it.
+            args:
+                code (str): The competition code to refresh.
+            returns:
+                bool: True if a new snapshot was installed, False if the data was unchanged (304) or the request failed.
+        """
+        writer = self.store.is_writer()
+        loaded = self._load(code)
+        if not writer and not self._is_stale(code):
+            return loaded
+        with self.store.fetch_lock(code):
+            # Another process may have saved the competition while this one waited for the lock
+            loaded = self._load(code) or loaded
+            if not writer and not self._is_stale(code):
+                return loaded
+            return self._fetch(code) or loaded
+
+    def _is_stale(self, code):
+        # A competition nobody has asked the API for in two polling intervals is fetched by the first process that notices
+        meta = self.store.read_meta(code)
+        if meta is None:
+            return True
+        return time.time() - meta.get("checked_at", 0) > 2 * get_poll_interval(self.snapshot(code))
+
+    def _fetch(self, code):
+        # Conditional request to the API, new data is installed and saved to the shared store
+        url, normalizer = self._sources[code]
+        current = self.snapshot(code)
+        request_headers = {}
+        if current.etag:
+            request_headers['If-None-Match'] = current.etag
+        if current.last_modified:
+            request_headers['If-Modified-Since'] = current.last_modified
+        try:
+            resp = self.client.get(url, request_headers)
+            if resp.status_code == 304:
+                self.store.mark_checked(code)
+                return False
+            resp.raise_for_status()
+            matches = resp.json().get('matches', [])
+        except (requests.RequestException, ValueError, AttributeError) as e:
+            logger.warning("Could not refresh %s matches: %s", code, e)
+            return False
+
+        with NORMALIZE_SECONDS.time(competition=code):
+            df = normalizer(matches)
+        live, next_kickoff = get_live_state(df)
+        etag, last_modified = resp.headers.get('ETag'), resp.headers.get('Last-Modified')
+        # Saved first, so the listeners of this process see the same stored version as the processes loading it
+        stored_version = self.store.write(code, df, etag, last_modified, live, next_kickoff)
+        if stored_version is not None:
+            # The frame is installed from the mapped file like in the other processes, instead of keeping a private copy
+            meta, shared_df = self.store.read(code)
+            if shared_df is not None and meta["version"] == stored_version:
+                df = shared_df
+        self._install(code, df, etag, last_modified, live, next_kickoff, stored_version)
+        self._disk_versions[code] = stored_version
+        return True
+
+    def _load(self, code):
+        # Install the shared snapshot of a competition if the writer saved a version this process has not loaded yet
+        meta = self.store.read_meta(code)
+        if meta is None or meta["version"] == self._disk_versions.get(code):
+            return False
+        meta, df = self.store.read(code, meta)
+        if df is None:
+            return False
+        self._install(code, df, meta.get("etag"), meta.get("last_modified"), meta.get("live", False), meta.get("next_kickoff"), meta["version"])
+        self._disk_versions[code] = meta["version"]
+        return True
+
+    def subscribe(self, listener):
+        """ This function registers a function called after every new snapshot is installed.
+            args:
+                listener (function): Called as listener(code, previous, snapshot). snapshot.changes holds what changed since
+                previous, or None if everything must be considered changed.
+        """
+        self._listeners.append(listener)
+
+    def _install(self, code, df, etag, last_modified, live, next_kickoff, stored_version=None):
+        index = MatchIndex(df)
+        with self._lock:
+            previous = self.snapshot(code)
+            version = previous.version + 1
+            if stored_version is None:
+                # The snapshot could not be saved, it keeps the stored version of the data it replaces
+                stored_version = previous.stored_version
+            changes = diff_matches(previous.df, df) if previous.version > 0 else None
+            stage_versions, matchday_versions = get_part_versions(index, version, previous, changes)
+            snapshot = Snapshot(
+                version=version,
+                stored_version=stored_version,
+                df=df,
+                index=index,
+                etag=etag,
+                last_modified=last_modified,
+                live=live,
+                next_kickoff=next_kickoff,
+                # The stage list is only recomputed when a stage appears or disappears
+                stages=previous.stages if changes is not None and not changes.stages_changed else index.stages,
+                stage_versions=stage_versions,
+                matchday_versions=matchday_versions,
+                changes=changes,
+                # Standings per stage, filled on first use by standings.get_standings
+                standings={}
+            )
+            self._snapshots[code] = snapshot
+        SNAPSHOTS.inc(competition=code)
+        for listener in self._listeners:
+            try:
+                listener(code, previous, snapshot)
+            except Exception:
+                logger.exception("Snapshot listener failed for %s", code)
+        return snapshot
+
+    def refresh_all(self, timeout=None, codes=None):
+        """ This function refreshes every tracked competition concurrently, so the total time is that of the slowest competition.
+            args:
+                timeout (float): Maximum number of seconds to wait. Refreshes still running afterwards keep going in the background
+                and install their snapshot when they finish. None waits for all of them.
+                codes (list): The competitions to refresh, all the tracked ones if None.
+        """
+        if codes is None:
+            with self._lock:
+                codes = list(self._sources)
+        if not codes:
+            return
+        executor = ThreadPoolExecutor(max_workers=len(codes), thread_name_prefix="match-data-fetch")
+        futures = [executor.submit(self.refresh, code) for code in codes]
+        executor.shutdown(wait=False)
+        wait(futures, timeout=timeout)
+
+    def next_interval(self):
+        """ This function returns how long to wait before the next poll.
+        The live interval is used while any competition has a match in progress or about to start,
+        and always by the processes that only read the shared store, since checking it costs a single small file read.
+        """
+        if not self.store.is_writer():
+            return LIVE_REFRESH_INTERVAL
+        return min([get_poll_interval(snapshot) for snapshot in list(self._snapshots.values())], default=REFRESH_INTERVAL)
+
+    def live_status(self):
+        """ This function tells browsers whether to keep a live score connection open.
+            returns:
+                dict: "live" is True while a tracked competition has a match in progress, and "retry" is the number of seconds
+                after which the answer may change, the next poll of the most urgent competition.
+        """
+        snapshots = list(self._snapshots.values())
+        return {
+            "live": any(snapshot.live for snapshot in snapshots),
+            "retry": min([get_poll_interval(snapshot) for snapshot in snapshots], default=REFRESH_INTERVAL),
+        }
+
+    def start(self):
+        """ This function starts the background polling thread, it does nothing if the thread is already running. """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="match-data-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ This function asks the background polling thread to finish. """
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.next_interval()):
+            try:
+                self.refresh_all()
+            except Exception:
+                logger.exception("Unexpected error while refreshing match data")
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+try:
+    import fcntl
+except ImportError:  # Windows, every process writes its own snapshots
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two attempts to take a fetch lock held by another process
+FETCH_LOCK_POLL = 0.05
+
+# Directory shared by every worker of the dyno, holding the normalized frames and their metadata
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.snapshots'))
+
+
+def write_atomic(path, write):
+    """ This function writes a file next to its final path and renames it, so readers never see a partial file.
+        args:
+            path (str): The final path of the file.
+            write (function): A function receiving the temporary path to write to.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SnapshotStore:
+    """ Normalized match frames shared on disk by every worker process.
+    One process, the one holding an exclusive lock on the directory, polls the API and writes each new snapshot as an
+    uncompressed Feather file plus a small JSON metadata file with its version and the time the API was last checked.
+    The other processes compare the version in the metadata with their own and read the Feather file when it is newer,
+    so the API is called and the payload normalized once per dyno instead of once per worker.
+    Every process, the writer included, works on the frame read back from the memory-mapped file. Its Arrow-backed columns
+    point at the mapped pages, which the operating system shares between the processes, and only the categorical codes of
+    the stage, group and status columns are copied, so the memory of the frames does not grow with the number of workers.
+    Fetches are serialized per competition with fetch_lock, so a cold start with several workers makes one API request.
+    If the writer exits its lock is released and the next process that checks takes over.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+        self._lock_file = None
+
+    def is_writer(self):
+        """ This function tells whether this process writes the snapshots, trying to become the writer if nobody is. """
+        if self._lock_file is not None:
+            return True
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            lock_file = open(os.path.join(self.directory, "writer.lock"), "a")
+        except OSError as e:
+            logger.warning("Could not open snapshot lock, fetching without sharing: %s", e)
+            return True
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        # The lock is held, through the open file, for the life of the process
+        self._lock_file = lock_file
+        logger.info("Process %d writes the match snapshots", os.getpid())
+        return True
+
+    @contextmanager
+    def fetch_lock(self, code):
+        """ This function is a context manager holding an exclusive lock on a competition across processes while it is fetched
+        and saved. A process that waited for the lock should read the metadata again, the competition may have been saved meanwhile.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            lock_file = open(os.path.join(self.directory, f"{code}.fetch.lock"), "a")
+        except OSError as e:
+            logger.warning("Could not open %s fetch lock, fetching without it: %s", code, e)
+            yield
+            return
+        # Closing the file releases the lock. It is polled instead of waited for, a blocking flock would stall every
+        # greenlet of a gevent worker while another process fetches
+        with lock_file:
+            while fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    time.sleep(FETCH_LOCK_POLL)
+            yield
+
+    def _meta_path(self, code):
+        return os.path.join(self.directory, f"{code}.json")
+
+    def read_meta(self, code):
+        """ This function returns the metadata of the latest snapshot of a competition, or None if there is none.
+            returns:
+                dict: The keys "version", "file", "etag", "last_modified", "live", "next_kickoff" and "checked_at", the epoch
+                time the API was last asked for the competition.
+        """
+        try:
+            with open(self._meta_path(code)) as f:
+                meta = json.load(f)
+            if isinstance(meta, dict) and "version" in meta and "file" in meta:
+                return meta
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def read(self, code, meta=None):
+        """ This function loads the frame of the latest snapshot of a competition from its memory-mapped Feather file.
+        The columns stay Arrow arrays over the mapped file, except for the dictionary columns turned into categoricals.
+            args:
+                code (str): The competition code.
+                meta (dict): The metadata already read with read_meta, read again if None.
+            returns:
+                tuple: (meta, df), or (None, None) if there is no readable snapshot.
+        """
+        meta = meta or self.read_meta(code)
+        if meta is None:
+            return None, None
+        try:
+            table = feather.read_table(os.path.join(self.directory, meta["file"]), memory_map=True)
+            return meta, table.to_pandas(types_mapper=_arrow_dtype)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read %s snapshot: %s", code, e)
+            return None, None
+
+    def write(self, code, df, etag, last_modified, live, next_kickoff):
+        """ This function saves a snapshot of a competition, the frame first and then the metadata pointing at it.
+        Stored versions are numbered by the store and keep growing when another process becomes the writer.
+        Errors are logged and ignored, the snapshot stays available in memory.
+            args:
+                code (str): The competition code.
+                df (DataFrame): The normalized match frame.
+                etag (str): The ETag of the API response, or None.
+                last_modified (str): The Last-Modified header of the API response, or None.
+                live (bool): True if a match is in progress.
+                next_kickoff (float): The epoch time of the next kickoff, or None.
+            returns:
+                int: The stored version, or None if the snapshot could not be saved.
+        """
+        previous = self.read_meta(code)
+        version = (previous["version"] if previous else 0) + 1
+        file_name = f"{code}.{version}.feather"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomic(
+                os.path.join(self.directory, file_name),
+                lambda path: df.to_feather(path, compression="uncompressed")
+            )
+            meta = {
+                "version": version,
+                "file": file_name,
+                "etag": etag,
+                "last_modified": last_modified,
+                "live": live,
+                "next_kickoff": next_kickoff,
+                "checked_at": time.time(),
+            }
+            write_atomic(self._meta_path(code), lambda path: _dump_json(meta, path))
+        except (OSError, ValueError) as e:
+            logger.warning("Could not save %s snapshot: %s", code, e)
+            return None
+        # Readers that mapped the previous file keep it alive until they drop it
+        if previous is not None and previous["file"] != file_name:
+            try:
+                os.remove(os.path.join(self.directory, previous["file"]))
+            except OSError:
+                pass
+        return version
+
+    def mark_checked(self, code):
+        """ This function records that the API was asked for a competition and answered that nothing changed (304). """
+        meta = self.read_meta(code)
+        if meta is None:
+            return
+        meta["checked_at"] = time.time()
+        try:
+            write_atomic(self._meta_path(code), lambda path: _dump_json(meta, path))
+        except (OSError, ValueError) as e:
+            logger.warning("Could not update %s snapshot metadata: %s", code, e)
+
+
+def _arrow_dtype(arrow_type):
+    # Dictionary columns are converted by pandas to categoricals, every other column keeps its Arrow array
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def _dump_json(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f)
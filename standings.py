@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# Columns of a standings table, in display order
+STANDINGS_COLUMNS = ["Position", "Team", "P", "W", "D", "L", "GF", "GA", "GD", "Pts"]
+
+# Criteria ranking teams level on points, in order. Groups follow the FIFA World Cup rules (head-to-head first), a stage
+# without groups the UEFA league phase rules. Fair play points, coefficients and the drawing of lots are not in the API,
+# teams still level on every criterion keep the order in which they first appear in the matches.
+GROUP_TIE_BREAKERS = ["H2H Pts", "H2H GD", "H2H GF", "GD", "GF"]
+LEAGUE_TIE_BREAKERS = ["GD", "GF", "Away GF", "W", "Away W", "Opp Pts", "Opp GD", "Opp GF"]
+
+
+def compute_standings(matches):
+    """ This function computes the standings of every group in a frame of matches in a single vectorized pass.
+    Every match is seen twice, from the home and from the away team, and every total (played, won, drawn and lost matches,
+    goals for and against) is one bincount over the team codes. Matches with a score count, so standings follow live games.
+    Teams are ranked by points and then by GROUP_TIE_BREAKERS in a group or LEAGUE_TIE_BREAKERS in a league phase. The
+    head-to-head criteria are computed once over the matches between teams level on points, not applied again to a subset
+    still level afterwards.
+        args:
+            matches (DataFrame): Normalized matches of one stage, e.g. a MatchIndex stage slice.
+        returns:
+            dict: One DataFrame with the STANDINGS_COLUMNS per group, keyed by group name, or by None for a stage without groups
+            like the Champions League league phase.
+    """
+    known = matches[matches["Home Team"].notna() & matches["Away Team"].notna()]
+    if known.empty:
+        return {}
+    group = known["Group"].astype(object).where(known["Group"].notna(), None).to_numpy()
+    home_goals = known["Home Score"].to_numpy(dtype="float64", na_value=np.nan)
+    away_goals = known["Away Score"].to_numpy(dtype="float64", na_value=np.nan)
+
+    # One entry per team and match, home perspective first and away perspective second
+    team_rows, teams = pd.factorize(np.concatenate([known["Home Team"].to_numpy(), known["Away Team"].to_numpy()]))
+    opponent_rows = np.roll(team_rows, len(known))
+    away = np.arange(len(team_rows)) >= len(known)
+    goals_for = np.concatenate([home_goals, away_goals])
+    goals_against = np.concatenate([away_goals, home_goals])
+    played = ~np.isnan(goals_for) & ~np.isnan(goals_against)
+    goals_for, goals_against = np.where(played, goals_for, 0), np.where(played, goals_against, 0)
+    won, drawn = played & (goals_for > goals_against), played & (goals_for == goals_against)
+
+    def per_team(values, mask=played):
+        return np.bincount(team_rows[mask], weights=np.broadcast_to(values, team_rows.shape)[mask], minlength=len(teams)).astype(int)
+
+    columns = {
+        "Team": teams,
+        "P": per_team(1),
+        "W": per_team(won),
+        "D": per_team(drawn),
+        "L": per_team(goals_for < goals_against),
+        "GF": per_team(goals_for),
+        "GA": per_team(goals_against),
+        "Away GF": per_team(goals_for, played & away),
+        "Away W": per_team(won, away),
+    }
+    columns["GD"] = columns["GF"] - columns["GA"]
+    columns["Pts"] = 3 * columns["W"] + columns["D"]
+    points = columns["Pts"]
+    # Head-to-head: the matches between two teams level on points, e.g. the mini-league of the tied teams of a group
+    head_to_head = played & (points[team_rows] == points[opponent_rows])
+    columns["H2H Pts"] = per_team(3 * won + drawn, head_to_head)
+    columns["H2H GD"] = per_team(goals_for - goals_against, head_to_head)
+    columns["H2H GF"] = per_team(goals_for, head_to_head)
+    # Points, goal difference and goals of the opponents faced, counted once per match played against them
+    columns["Opp Pts"] = per_team(points[opponent_rows])
+    columns["Opp GD"] = per_team(columns["GD"][opponent_rows])
+    columns["Opp GF"] = per_team(columns["GF"][opponent_rows])
+
+    # A team plays in a single group of a stage, the group of its first match. Team codes follow the order of first
+    # appearance, and the stable lexsort keeps that order for teams level on every criterion
+    team_groups = np.concatenate([group, group])[np.unique(team_rows, return_index=True)[1]]
+    grouped = pd.notna(team_groups)
+    standings = {}
+    for g in ([None] if not grouped.all() else []) + sorted(set(team_groups[grouped])):
+        rows = np.flatnonzero(~grouped if g is None else team_groups == g)
+        criteria = ["Pts"] + (LEAGUE_TIE_BREAKERS if g is None else GROUP_TIE_BREAKERS)
+        rows = rows[np.lexsort([-columns[col][rows] for col in reversed(criteria)])]
+        table = pd.DataFrame({col: columns[col][rows] for col in STANDINGS_COLUMNS[1:]})
+        table.insert(0, "Position", np.arange(1, len(rows) + 1))
+        standings[g] = table
+    return standings
+
+
+def get_standings(snapshot, stage):
+    """ This function returns the standings of a stage of a snapshot, computing them on first use and caching them in the snapshot.
+        args:
+            snapshot (Snapshot): The snapshot of the competition.
+            stage (str): The stage code, e.g. GROUP_STAGE or LEAGUE_STAGE.
+        returns:
+            dict: The standings of every group of the stage, as returned by compute_standings.
+    """
+    standings = snapshot.standings.get(stage)
+    if standings is None:
+        standings = snapshot.standings[stage] = compute_standings(snapshot.index.stage(stage))
+    return standings
+
+
+def carry_over_standings(code, previous, snapshot):
+    """ This function is a snapshot listener that updates the standings already computed for the previous snapshot.
+    Stages without changed matches keep their standings, and in a stage with groups only the groups with a changed match are
+    computed again. A league phase is a single table whose opponent tie-breakers depend on every match, so a change in it
+    computes the whole table again here, in the refresh, instead of in the next request. Standings not computed yet are left
+    to get_standings.
+    """
+    changes = snapshot.changes
+    if changes is None:
+        return
+    for stage, standings in previous.standings.items():
+        if stage not in changes.stages:
+            snapshot.standings[stage] = standings
+            continue
+        if changes.stages_changed:
+            continue
+        if None in standings:
+            snapshot.standings[stage] = compute_standings(snapshot.index.stage(stage))
+            continue
+        changed_groups = {g for s, g in changes.groups if s == stage}
+        if not changed_groups:
+            continue
+        updated = dict(standings)
+        for g in changed_groups:
+            updated.update(compute_standings(snapshot.index.group(stage, g)))
+        snapshot.standings[stage] = updated
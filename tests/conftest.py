@@ -0,0 +1,8 @@
+import os
+import sys
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+# The app modules live at the root of the repository, the helpers shared by the tests (matches.py) in this folder
+sys.path.insert(0, os.path.dirname(TESTS))
+sys.path.insert(0, TESTS)
@@ -0,0 +1,19 @@
+def make_match(match_id, stage="GROUP_STAGE", group="GROUP_A", home="Spain", away="Japan", status="FINISHED",
+               date="2026-06-11T18:00:00Z", duration="REGULAR", full_time=(1, 0), regular_time=None, extra_time=None,
+               penalties=None, winner=None):
+    """ This function builds one match in the shape of the football-data.org matches endpoint. """
+    score = {"winner": winner, "duration": duration, "fullTime": {"home": full_time[0], "away": full_time[1]}}
+    for part, value in (("regularTime", regular_time), ("extraTime", extra_time), ("penalties", penalties)):
+        if value is not None:
+            score[part] = {"home": value[0], "away": value[1]}
+    return {
+        "id": match_id,
+        "utcDate": date,
+        "status": status,
+        "matchday": 1 if stage == "GROUP_STAGE" else None,
+        "stage": stage,
+        "group": group if stage == "GROUP_STAGE" else None,
+        "homeTeam": {"name": home},
+        "awayTeam": {"name": away},
+        "score": score,
+    }
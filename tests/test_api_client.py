@@ -0,0 +1,89 @@
+import threading
+import time
+
+from api_client import FootballDataClient, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """ Answers with the given responses in turn, slowly, and records when each request was sent. """
+
+    def __init__(self, *responses, delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        with self._lock:
+            self.sent.append(time.monotonic())
+            response = self.responses[min(len(self.sent), len(self.responses)) - 1]
+        time.sleep(self.delay)
+        return response
+
+
+def make_client(session, capacity=10):
+    client = FootballDataClient("token", rate_limiter=TokenBucket(capacity))
+    client.session = session
+    return client
+
+
+def test_concurrent_identical_requests_share_one_call():
+    session = FakeSession(FakeResponse(), delay=0.2)
+    client = make_client(session)
+    responses = [None] * 5
+
+    def get(i):
+        responses[i] = client.get("http://stub/WC", {"If-None-Match": '"v1"'})
+
+    threads = [threading.Thread(target=get, args=(i,)) for i in range(len(responses))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(session.sent) == 1
+    assert all(response is responses[0] for response in responses)
+    # Different headers are a different request
+    client.get("http://stub/WC", {"If-None-Match": '"v2"'})
+    assert len(session.sent) == 2
+
+
+def test_rate_limited_request_waits_for_retry_after():
+    session = FakeSession(FakeResponse(429, {"Retry-After": "0.3"}), FakeResponse())
+    client = make_client(session)
+    assert client.get("http://stub/WC").status_code == 200
+    assert len(session.sent) == 2
+    assert session.sent[1] - session.sent[0] >= 0.3
+
+
+def test_requests_wait_for_the_advertised_reset():
+    session = FakeSession(FakeResponse(headers={"X-Requests-Available-Minute": "0", "X-RequestCounter-Reset": "0.3"}))
+    client = make_client(session)
+    client.get("http://stub/WC")
+    client.get("http://stub/CL")
+    # The second request is sent once the API counter resets, not one drip of capacity per minute later
+    assert 0.3 <= session.sent[1] - session.sent[0] < 1
+
+
+def test_bucket_adopts_the_advertised_limit():
+    bucket = TokenBucket(10)
+    bucket.update(29, 0.2)
+    assert bucket.capacity == 30 and bucket.tokens == 29
+    time.sleep(0.2)
+    bucket.acquire()
+    assert bucket.tokens == 29
+
+
+def test_bucket_refills_after_reset():
+    bucket = TokenBucket(10)
+    bucket.update(0, 0.2)
+    start = time.monotonic()
+    bucket.acquire()
+    assert 0.2 <= time.monotonic() - start < 1
+    assert bucket.tokens == 9
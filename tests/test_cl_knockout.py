@@ -0,0 +1,60 @@
+import pandas as pd
+
+from functions import normalize_matches_cl, get_cl_stage_component, format_score
+from match_index import MatchIndex
+from matches import make_match
+
+
+def find_text(component, class_name):
+    """ This function returns the children of every component of a Dash tree with the given className. """
+    found = []
+    if getattr(component, "className", None) == class_name:
+        found.append(component.children)
+    children = getattr(component, "children", None)
+    for child in children if isinstance(children, (list, tuple)) else [children]:
+        if hasattr(child, "children"):
+            found.extend(find_text(child, class_name))
+    return found
+
+
+def make_leg(match_id, home, away, date, status="FINISHED", **score):
+    return make_match(match_id, stage="LAST_16", home=home, away=away, status=status, date=date, **score)
+
+
+def test_shootout_is_kept_apart_from_the_score():
+    df = normalize_matches_cl([make_leg(
+        1, "Arsenal", "Benfica", "2026-03-11T20:00:00Z", duration="PENALTY_SHOOTOUT", full_time=(5, 4),
+        regular_time=(1, 1), extra_time=(0, 0), penalties=(4, 3), winner="HOME_TEAM"
+    )])
+    assert (df.loc[0, "Home Score"], df.loc[0, "Away Score"]) == (1, 1)
+    assert (df.loc[0, "Home Penalties"], df.loc[0, "Away Penalties"]) == (4, 3)
+    assert format_score(df["Home Score"], df["Home Penalties"]).tolist() == ["1 (4)"]
+
+
+def test_aggregate_excludes_the_shootout():
+    df = normalize_matches_cl([
+        make_leg(1, "Arsenal", "Benfica", "2026-03-04T20:00:00Z", full_time=(1, 1), winner="DRAW"),
+        make_leg(2, "Benfica", "Arsenal", "2026-03-11T20:00:00Z", duration="PENALTY_SHOOTOUT", full_time=(4, 5),
+                 regular_time=(1, 1), extra_time=(0, 0), penalties=(3, 4), winner="AWAY_TEAM"),
+    ])
+    component = get_cl_stage_component(MatchIndex(df), "LAST_16", "Last 16")
+    assert find_text(component, "matchup-aggregate") == ["Aggregate 2 - 2, 4 - 3 on penalties"]
+
+
+def test_no_aggregate_before_the_second_leg():
+    df = normalize_matches_cl([
+        make_leg(1, "Arsenal", "Benfica", "2026-03-04T20:00:00Z", full_time=(2, 0), winner="HOME_TEAM"),
+        make_leg(2, "Benfica", "Arsenal", "2026-03-11T20:00:00Z", status="TIMED", full_time=(None, None)),
+    ])
+    component = get_cl_stage_component(MatchIndex(df), "LAST_16", "Last 16")
+    assert find_text(component, "matchup-aggregate") == []
+    assert len(find_text(component, "generic-text-4")) == 1
+    assert pd.isna(df.loc[1, "Home Score"])
+
+
+def test_match_day_ids_carry_the_competition_code():
+    df = normalize_matches_cl([dict(make_match(1, stage="LEAGUE_STAGE"), matchday=1)])
+    component = get_cl_stage_component(MatchIndex(df), "LEAGUE_STAGE", "League Stage", code="EL")
+    tabs, content = component.children
+    assert tabs.id == {"type": "match-day-tabs", "competition": "EL", "stage": "LEAGUE_STAGE"}
+    assert content.id == {"type": "match-day-content", "competition": "EL", "stage": "LEAGUE_STAGE"}
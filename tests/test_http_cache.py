@@ -0,0 +1,26 @@
+import dash
+import pytest
+from dash import html
+
+from http_cache import register_http_caching
+
+
+@pytest.fixture
+def client():
+    app = dash.Dash(__name__, compress=True)
+    app.layout = html.Div([html.P("Scores") for _ in range(200)])
+    register_http_caching(app.server)
+    return app.server.test_client()
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "identity"])
+@pytest.mark.parametrize("path", ["/_dash-layout", "/_dash-dependencies"])
+def test_revalidation_under_compression(client, path, encoding):
+    first = client.get(path, headers={"Accept-Encoding": encoding})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    if encoding != "identity" and path == "/_dash-layout":
+        assert etag.endswith(f':{encoding}"')
+    second = client.get(path, headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
@@ -0,0 +1,90 @@
+import json
+import time
+
+from flask import Flask
+
+from functions import normalize_matches_wc
+from live import ScorePublisher, register_live_routes
+from matches import make_match
+from refresher import MatchDataRefresher
+from snapshot_store import SnapshotStore
+
+
+def make_client(status):
+    server = Flask(__name__)
+    publisher = ScorePublisher()
+    register_live_routes(server, publisher, lambda: dict(status))
+    return server.test_client(), publisher
+
+
+def test_stream_ends_when_nothing_is_live():
+    client, _ = make_client({"live": False, "retry": 600})
+    body = client.get("/live/stream").get_data(as_text=True)
+    assert body.endswith('event: idle\ndata: {"live": false, "retry": 600}\n\n')
+
+
+def test_poll_does_not_wait_when_nothing_is_live():
+    client, publisher = make_client({"live": False, "retry": 600})
+    publisher.publish("WC", 1, [{"id": 1, "version": 1, "home": "1", "away": "0"}])
+    start = time.monotonic()
+    body = client.get("/live/poll?since=WC:0").get_json()
+    assert time.monotonic() - start < 1
+    assert body == {"since": "WC:1", "events": [[{"id": 1, "version": 1, "home": "1", "away": "0"}]], "live": False, "retry": 600}
+
+
+def test_status_is_not_cached():
+    client, _ = make_client({"live": True, "retry": 60})
+    response = client.get("/live/status")
+    assert response.get_json() == {"live": True, "retry": 60}
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_resume_on_another_worker_skips_the_versions_already_seen():
+    # Two workers publish the same stored versions, the second one loaded CL version 2 later than the first
+    first, first_publisher = make_client({"live": True, "retry": 30})
+    second, second_publisher = make_client({"live": True, "retry": 30})
+    for publisher in (first_publisher, second_publisher):
+        publisher.publish("WC", 1, [{"id": 1, "version": 1, "home": "1", "away": "0"}])
+        publisher.publish("CL", 1, [{"id": 7, "version": 1, "home": "0", "away": "0"}])
+    first_publisher.publish("CL", 2, [{"id": 7, "version": 2, "home": "1", "away": "0"}])
+
+    body = first.get("/live/poll?since=CL:1,WC:1").get_json()
+    assert body["since"] == "CL:2,WC:1"
+    assert body["events"] == [[{"id": 7, "version": 2, "home": "1", "away": "0"}]]
+
+    # The second worker sends nothing older again, and the CL version 2 update once it has it
+    second_publisher.publish("CL", 2, [{"id": 7, "version": 2, "home": "1", "away": "0"}])
+    second_publisher.publish("WC", 2, [{"id": 1, "version": 2, "home": "2", "away": "0"}])
+    body = second.get("/live/poll", query_string={"since": body["since"]}).get_json()
+    assert body["since"] == "CL:2,WC:2"
+    assert body["events"] == [[{"id": 1, "version": 2, "home": "2", "away": "0"}]]
+
+
+def test_new_client_starts_from_the_current_versions():
+    client, publisher = make_client({"live": False, "retry": 600})
+    publisher.publish("WC", 3, [{"id": 1, "version": 3, "home": "1", "away": "0"}])
+    assert client.get("/live/poll").get_json()["events"] == []
+
+
+def test_stream_event_ids_carry_the_versions():
+    client, publisher = make_client({"live": True, "retry": 30})
+    publisher.publish("WC", 4, [{"id": 1, "version": 4, "home": "1", "away": "0"}])
+    response = client.get("/live/stream", headers={"Last-Event-ID": "WC:3"})
+    chunks = response.response
+    assert next(chunks) == b"retry: 2000\n\n"
+    assert next(chunks) == b'id: WC:4\ndata: [{"id": 1, "version": 4, "home": "1", "away": "0"}]\n\n'
+    response.close()
+
+
+def test_deltas_carry_the_stored_version(tmp_path):
+    refresher = MatchDataRefresher(client=None, store=SnapshotStore(str(tmp_path)))
+    publisher = ScorePublisher()
+    refresher.subscribe(publisher.on_snapshot)
+    refresher._install("WC", normalize_matches_wc([make_match(1, status="IN_PLAY", full_time=(0, 0))]), None, None, True, None, 5)
+    refresher._install("WC", normalize_matches_wc([make_match(1, status="IN_PLAY", full_time=(1, 0))]), None, None, True, None, 6)
+    # A snapshot that could not be saved keeps the stored version of the data it replaces
+    refresher._install("WC", normalize_matches_wc([make_match(1, status="IN_PLAY", full_time=(2, 0))]), None, None, True, None)
+
+    events = publisher.wait({"WC": 0}, 0)
+    assert [(code, version) for code, version, _ in events] == [("WC", 6), ("WC", 6)]
+    assert json.loads(events[0][2])[0]["version"] == 6
@@ -0,0 +1,25 @@
+from flask import Flask
+
+from metrics import RESPONSE_BYTES, register_metrics, set_response_labels
+
+
+def test_callback_response_size_per_stage():
+    server = Flask(__name__)
+    register_metrics(server)
+
+    @server.route("/_dash-update-component", methods=["POST"])
+    def update_component():
+        stage = server.config["STAGE"]
+        set_response_labels(callback="update_tab", competition="CL", stage=stage)
+        return "x" * (100 if stage == "FINAL" else 2000)
+
+    client = server.test_client()
+    for stage in ("FINAL", "LEAGUE_STAGE"):
+        server.config["STAGE"] = stage
+        client.post("/_dash-update-component")
+    body = client.get("/metrics").get_data(as_text=True)
+
+    labels = 'endpoint="/_dash-update-component",callback="update_tab",competition="CL"'
+    assert f'football_response_bytes_sum{{{labels},stage="FINAL"}} 100' in body
+    assert f'football_response_bytes_sum{{{labels},stage="LEAGUE_STAGE"}} 2000' in body
+    assert RESPONSE_BYTES.labelnames == ("endpoint", "callback", "competition", "stage")
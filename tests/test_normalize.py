@@ -0,0 +1,104 @@
+import pandas as pd
+
+from functions import MATCH_COLUMNS, normalize_matches_wc
+from matches import make_match
+
+
+def row(df, match_id):
+    return df[df["Id"] == match_id].iloc[0]
+
+
+def test_columns_and_dtypes():
+    df = normalize_matches_wc([make_match(1)])
+    assert list(df.columns) == list(MATCH_COLUMNS)
+    assert {col: str(df[col].dtype) for col in df.columns} == {col: str(dtype) for col, dtype in MATCH_COLUMNS.items()}
+
+
+def test_regular_time():
+    df = normalize_matches_wc([make_match(1, full_time=(2, 1), winner="HOME_TEAM")])
+    match = row(df, 1)
+    assert (match["Home Score"], match["Away Score"]) == (2, 1)
+    assert pd.isna(match["Home Penalties"]) and pd.isna(match["Away Penalties"])
+    # Group stage matches have no winner
+    assert match["Winner"] == ""
+
+
+def test_extra_time():
+    df = normalize_matches_wc([make_match(
+        2, stage="FINAL", duration="EXTRA_TIME", full_time=(2, 1), regular_time=(1, 1), extra_time=(1, 0), winner="HOME_TEAM"
+    )])
+    match = row(df, 2)
+    assert (match["Home Score"], match["Away Score"]) == (2, 1)
+    assert pd.isna(match["Home Penalties"])
+    assert match["Winner"] == "Spain"
+
+
+def test_penalty_shootout():
+    # The full time score of a shootout includes the penalties, the displayed score does not
+    df = normalize_matches_wc([make_match(
+        3, stage="LAST_16", duration="PENALTY_SHOOTOUT", full_time=(5, 4), regular_time=(1, 1), extra_time=(0, 0),
+        penalties=(4, 3), winner="HOME_TEAM"
+    )])
+    match = row(df, 3)
+    assert (match["Home Score"], match["Away Score"]) == (1, 1)
+    assert (match["Home Penalties"], match["Away Penalties"]) == (4, 3)
+    assert match["Winner"] == "Spain"
+
+
+def test_penalty_shootout_without_regular_time():
+    # Without the regularTime part the score is the full time score minus the shootout
+    df = normalize_matches_wc([make_match(
+        4, stage="LAST_16", duration="PENALTY_SHOOTOUT", full_time=(6, 5), penalties=(5, 4), winner="AWAY_TEAM"
+    )])
+    match = row(df, 4)
+    assert (match["Home Score"], match["Away Score"]) == (1, 1)
+    assert match["Winner"] == "Japan"
+
+
+def test_tbd_teams_and_scheduled_match():
+    df = normalize_matches_wc([make_match(5, stage="FINAL", home=None, away=None, status="TIMED", full_time=(None, None))])
+    match = row(df, 5)
+    assert pd.isna(match["Home Team"]) and pd.isna(match["Away Team"])
+    assert pd.isna(match["Home Score"]) and pd.isna(match["Away Score"])
+    assert match["Winner"] == ""
+
+
+def test_timestamp_shapes():
+    df = normalize_matches_wc([
+        make_match(6, date="2026-07-01T18:00:00Z"),
+        make_match(7, date="2026-07-01T18:00:00.000Z"),
+        make_match(8, date="2026-07-01T18:00:00+00:00"),
+    ])
+    assert df["Id"].tolist() == [6, 7, 8]
+    assert (df["Date"] == pd.Timestamp("2026-07-01T18:00:00Z")).all()
+    assert df.attrs["dropped"] == []
+
+
+def test_bad_rows_are_dropped():
+    df = normalize_matches_wc([
+        make_match(9),
+        make_match(10, date="not a date"),
+        make_match(11, full_time=("two", 0)),
+        make_match(12, full_time=(1.5, 0)),
+        dict(make_match(13), stage=None),
+        "not a match",
+    ])
+    assert df["Id"].tolist() == [9]
+    assert sorted(df.attrs["dropped"]) == [10, 11, 12, 13]
+
+
+def test_no_valid_matches():
+    df = normalize_matches_wc(["not a match"])
+    assert df.empty
+    assert list(df.columns) == list(MATCH_COLUMNS)
+
+
+def test_display_columns():
+    df = normalize_matches_wc([
+        make_match(6, stage="LAST_16", duration="PENALTY_SHOOTOUT", full_time=(5, 4), regular_time=(1, 1), extra_time=(0, 0),
+                   penalties=(4, 3), winner="HOME_TEAM"),
+        make_match(7, stage="FINAL", date="2026-07-19T19:00:00Z", status="TIMED", full_time=(None, None)),
+    ])
+    shootout, scheduled = row(df, 6), row(df, 7)
+    assert (shootout["Date Text"], shootout["Home Score Text"], shootout["Away Score Text"]) == ("2026-06-11", "1 (4)", "1 (3)")
+    assert (scheduled["Date Text"], scheduled["Home Score Text"], scheduled["Away Score Text"]) == ("2026-07-19", "", "")
@@ -0,0 +1,32 @@
+import time
+
+from functions import normalize_matches_wc
+from matches import make_match
+from refresher import get_live_state
+
+# 2030-07-01T18:00:00Z
+KICKOFF = 1909159200.0
+
+
+def test_next_kickoff_of_every_timestamp_shape():
+    for date in ("2030-07-01T18:00:00Z", "2030-07-01T18:00:00.000Z", "2030-07-01T18:00:00+00:00"):
+        df = normalize_matches_wc([make_match(1, status="TIMED", date=date, full_time=(None, None))])
+        assert get_live_state(df) == (False, KICKOFF)
+
+
+def test_live_and_closest_future_kickoff():
+    df = normalize_matches_wc([
+        make_match(1, status="IN_PLAY"),
+        make_match(2, status="TIMED", date="2030-07-02T18:00:00.000Z", full_time=(None, None)),
+        make_match(3, status="SCHEDULED", date="2030-07-01T18:00:00+00:00", full_time=(None, None)),
+        # Kickoffs in the past and finished matches do not count
+        make_match(4, status="TIMED", date="2020-07-01T18:00:00Z", full_time=(None, None)),
+        make_match(5, date="2030-06-30T18:00:00Z"),
+    ])
+    live, next_kickoff = get_live_state(df)
+    assert live
+    assert next_kickoff == KICKOFF and next_kickoff > time.time()
+
+
+def test_no_matches():
+    assert get_live_state(normalize_matches_wc([])) == (False, None)
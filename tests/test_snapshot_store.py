@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pandas as pd
+
+from functions import MATCH_COLUMNS, normalize_matches_wc
+from match_index import MatchIndex
+from refresher import MatchDataRefresher
+from snapshot_store import SnapshotStore
+from matches import make_match
+
+
+class FakeResponse:
+    def __init__(self, matches, status_code=200):
+        self.status_code = status_code
+        self.headers = {"ETag": '"v1"'}
+        self._matches = matches
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"matches": self._matches}
+
+
+class FakeClient:
+    """ Counts the requests and answers them slowly, so concurrent workers overlap. """
+
+    def __init__(self, matches):
+        self.matches = matches
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, headers):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.2)
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeResponse([], status_code=304)
+        return FakeResponse(self.matches)
+
+
+def test_cold_start_makes_one_request(tmp_path):
+    client = FakeClient([make_match(1), make_match(2, home="Brazil", away="Ghana")])
+    # Every refresher has its own store object, like separate worker processes sharing a directory
+    refreshers = [MatchDataRefresher(client, SnapshotStore(str(tmp_path))) for _ in range(4)]
+    snapshots = [None] * len(refreshers)
+
+    def open_competition(i):
+        snapshots[i] = refreshers[i].ensure("WC", "http://stub/WC", normalize_matches_wc, timeout=10)
+
+    threads = [threading.Thread(target=open_competition, args=(i,)) for i in range(len(refreshers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1
+    assert all(len(snapshot.df) == 2 for snapshot in snapshots)
+
+
+def test_reader_fetches_a_competition_the_writer_does_not_poll(tmp_path, monkeypatch):
+    client = FakeClient([make_match(1)])
+    writer = MatchDataRefresher(client, SnapshotStore(str(tmp_path)))
+    assert writer.store.is_writer()
+    reader = MatchDataRefresher(client, SnapshotStore(str(tmp_path)))
+    reader.ensure("WC", "http://stub/WC", normalize_matches_wc, timeout=10)
+    assert client.calls == 1
+
+    # A fresh store is only read, a store nobody checked for two intervals is checked again by the reader
+    assert reader.refresh("WC") is False
+    assert client.calls == 1
+    monkeypatch.setattr(time, "time", lambda real=time.time: real() + 3600)
+    reader.refresh("WC")
+    assert client.calls == 2
+
+
+def test_snapshot_is_read_back_unchanged_in_index_order(tmp_path):
+    df = normalize_matches_wc([
+        make_match(1, stage="FINAL", home=None, away=None, status="TIMED", full_time=(None, None), date="2026-07-19T19:00:00Z"),
+        make_match(2, group="GROUP_B", date="2026-06-12T18:00:00Z"),
+        make_match(3, group="GROUP_A", date="2026-06-13T18:00:00Z"),
+        make_match(4, group="GROUP_A", date="2026-06-11T18:00:00Z"),
+    ])
+    # Sorted by stage in payload order, group, match day and date, the index slices the frame instead of sorting a copy
+    assert df["Id"].tolist() == [1, 4, 3, 2]
+    index = MatchIndex(df)
+    assert index.df is df
+    assert index.group("GROUP_STAGE", "GROUP_A")["Id"].tolist() == [4, 3]
+
+    store = SnapshotStore(str(tmp_path))
+    version = store.write("WC", df, None, None, False, None)
+    meta, shared = store.read("WC")
+    assert meta["version"] == version
+    pd.testing.assert_frame_equal(shared, df)
+    assert {col: str(dtype) for col, dtype in shared.dtypes.items()} == {col: str(dtype) for col, dtype in MATCH_COLUMNS.items()}
+    assert MatchIndex(shared).df is shared
@@ -0,0 +1,138 @@
+from functions import normalize_matches_wc, normalize_matches_cl, get_standings_table
+from refresher import MatchDataRefresher
+from snapshot_store import SnapshotStore
+from standings import STANDINGS_COLUMNS, compute_standings, get_standings, carry_over_standings
+from matches import make_match
+
+# Group A: Spain and Brazil finish level on points, Spain ahead on goal difference
+GROUP_A = [
+    ("Spain", "Brazil", 2, 0), ("Spain", "Japan", 0, 1), ("Spain", "Ghana", 3, 0),
+    ("Brazil", "Japan", 3, 1), ("Brazil", "Ghana", 1, 0), ("Japan", "Ghana", 2, 2),
+]
+# Group B: four teams on 4 points and a goal difference of 0, ranked by goals scored
+GROUP_B = [
+    ("Peru", "Chile", 1, 1), ("Mali", "Iran", 0, 0), ("Peru", "Mali", 3, 2),
+    ("Chile", "Iran", 1, 0), ("Peru", "Iran", 0, 1), ("Mali", "Chile", 1, 0),
+]
+
+
+def make_group(group, results, first_id):
+    return [
+        make_match(first_id + i, group=group, home=home, away=away, full_time=(home_goals, away_goals),
+                   date=f"2026-06-{11 + i:02d}T18:00:00Z")
+        for i, (home, away, home_goals, away_goals) in enumerate(results)
+    ]
+
+
+def make_frame(group_b=GROUP_B):
+    return normalize_matches_wc(make_group("GROUP_A", GROUP_A, 1) + make_group("GROUP_B", group_b, 101))
+
+
+def table_rows(table):
+    return [tuple(row) for row in table[STANDINGS_COLUMNS].itertuples(index=False)]
+
+
+def test_points_and_goal_difference():
+    standings = compute_standings(make_frame())
+    assert table_rows(standings["GROUP_A"]) == [
+        (1, "Spain", 3, 2, 0, 1, 5, 1, 4, 6),
+        (2, "Brazil", 3, 2, 0, 1, 4, 3, 1, 6),
+        (3, "Japan", 3, 1, 1, 1, 4, 5, -1, 4),
+        (4, "Ghana", 3, 0, 1, 2, 2, 6, -4, 1),
+    ]
+
+
+def test_goals_scored_break_ties_on_points_and_goal_difference():
+    table = compute_standings(make_frame())["GROUP_B"]
+    assert table["Team"].tolist() == ["Peru", "Mali", "Chile", "Iran"]
+    assert table["Pts"].tolist() == [4, 4, 4, 4]
+    assert table["GD"].tolist() == [0, 0, 0, 0]
+    assert table["GF"].tolist() == [4, 3, 2, 1]
+
+
+def test_unplayed_matches_do_not_count():
+    df = normalize_matches_wc([
+        make_match(1, home="Spain", away="Japan", full_time=(1, 0)),
+        make_match(2, home="Spain", away="Ghana", status="TIMED", full_time=(None, None)),
+    ])
+    table = compute_standings(df)["GROUP_A"].set_index("Team")
+    assert table.loc["Spain", "P"] == 1
+    assert table.loc["Ghana", "P"] == 0 and table.loc["Ghana", "Pts"] == 0
+
+
+def test_standings_table_rows():
+    table = get_standings_table(compute_standings(make_frame())["GROUP_A"], "wc")
+    header, body = table.children
+    assert [cell.children for cell in header.children.children] == ["#", "Team", "P", "W", "D", "L", "GF", "GA", "GD", "Pts"]
+    assert [cell.children for cell in body.children[0].children] == [1, "Spain", 3, 2, 0, 1, 5, 1, 4, 6]
+
+
+def test_carry_over_recomputes_only_changed_groups(tmp_path):
+    refresher = MatchDataRefresher(client=None, store=SnapshotStore(str(tmp_path)))
+    refresher.subscribe(carry_over_standings)
+    first = refresher._install("WC", make_frame(), None, None, False, None)
+    before = get_standings(first, "GROUP_STAGE")
+
+    # Iran now beats Mali, group A is unchanged
+    group_b = [("Mali", "Iran", 0, 2) if (home, away) == ("Mali", "Iran") else (home, away, h, a) for home, away, h, a in GROUP_B]
+    second = refresher._install("WC", make_frame(group_b), None, None, False, None)
+
+    after = second.standings["GROUP_STAGE"]
+    assert after["GROUP_A"] is before["GROUP_A"]
+    assert after["GROUP_B"] is not before["GROUP_B"]
+    assert table_rows(after["GROUP_B"]) == table_rows(compute_standings(second.index.stage("GROUP_STAGE"))["GROUP_B"])
+    assert after["GROUP_B"]["Team"].iloc[0] == "Iran"
+
+
+def test_head_to_head_ranks_teams_level_on_points_before_goal_difference():
+    group = [
+        ("Spain", "Brazil", 1, 0), ("Spain", "Japan", 1, 0), ("Ghana", "Spain", 1, 0),
+        ("Brazil", "Japan", 5, 0), ("Brazil", "Ghana", 5, 0), ("Japan", "Ghana", 0, 0),
+    ]
+    table = compute_standings(normalize_matches_wc(make_group("GROUP_A", group, 1)))["GROUP_A"]
+    # Brazil has the better goal difference, Spain won their match
+    assert table["Team"].tolist() == ["Spain", "Brazil", "Ghana", "Japan"]
+    assert table["Pts"].tolist() == [6, 6, 4, 1]
+
+
+def make_league_matches(results, first_id=1):
+    return [
+        dict(make_match(first_id + i, stage="LEAGUE_STAGE", home=home, away=away, full_time=(home_goals, away_goals),
+                        date=f"2025-09-{16 + i:02d}T20:00:00Z"), matchday=1 + i // 2)
+        for i, (home, away, home_goals, away_goals) in enumerate(results)
+    ]
+
+
+def make_league(results, first_id=1):
+    return normalize_matches_cl(make_league_matches(results, first_id))
+
+
+def test_league_phase_ranks_away_goals_after_goals_scored():
+    table = compute_standings(make_league([("Porto", "Roma", 2, 1), ("Lille", "Ajax", 1, 2)]))[None]
+    # Ajax and Porto, then Roma and Lille, are level on points, goal difference and goals, Ajax and Roma scored away
+    assert table["Team"].tolist() == ["Ajax", "Porto", "Roma", "Lille"]
+    assert table["Position"].tolist() == [1, 2, 3, 4]
+
+
+def test_carry_over_recomputes_the_league_phase(tmp_path):
+    refresher = MatchDataRefresher(client=None, store=SnapshotStore(str(tmp_path)))
+    refresher.subscribe(carry_over_standings)
+    league = [("Porto", "Roma", 2, 1), ("Lille", "Ajax", 1, 2)]
+
+    def install(results, final_score):
+        final = make_match(10, stage="FINAL", home="Porto", away="Ajax", full_time=final_score, date="2026-05-30T19:00:00Z")
+        return refresher._install("CL", normalize_matches_cl(make_league_matches(results) + [final]), None, None, False, None)
+
+    first = install(league, (1, 0))
+    before = get_standings(first, "LEAGUE_STAGE")
+
+    # Only the final changed, the league table is carried over as it is
+    second = install(league, (2, 0))
+    assert second.standings["LEAGUE_STAGE"] is before
+
+    # A league match changed, the table is computed again in the refresh
+    third = install([("Porto", "Roma", 0, 3), ("Lille", "Ajax", 1, 2)], (2, 0))
+    after = third.standings["LEAGUE_STAGE"]
+    assert after is not before
+    assert table_rows(after[None]) == table_rows(compute_standings(third.index.stage("LEAGUE_STAGE"))[None])
+    assert after[None]["Team"].tolist() == ["Roma", "Ajax", "Lille", "Porto"]